@@ -0,0 +1,151 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+PERCENTILES = (50, 90, 99)
+# a case whose median is this much slower than in the compared run is marked as a regression
+REGRESSION_RATIO = 1.1
+
+
+def percentile(values: list[float], p: float) -> float:
+    # nearest rank on the sorted values
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summary(latencies: list[float]) -> dict:
+    # milliseconds, rounded so the files stay readable
+    if not latencies:
+        return {'count': 0}
+    result = {'count': len(latencies), 'mean': round(sum(latencies) / len(latencies) * 1000, 4)}
+    for p in PERCENTILES:
+        result[f'p{p}'] = round(percentile(latencies, p) * 1000, 4)
+    result['max'] = round(max(latencies) * 1000, 4)
+    return result
+
+
+def peak_rss() -> Optional[int]:
+    # bytes, for the whole life of the process; every case runs in its own process because of that
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.values: dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def measure(self, operation: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(operation, time.perf_counter() - started)
+
+    def add(self, operation: str, seconds: float):
+        self.latencies.setdefault(operation, []).append(seconds)
+
+    def result(self, name: str, params: dict) -> dict:
+        return {
+            'name': name,
+            'params': params,
+            'wall_time': round(time.perf_counter() - self.started, 4),
+            'peak_rss': peak_rss(),
+            'operations': {operation: summary(latencies) for operation, latencies in self.latencies.items()},
+            **({'values': self.values} if self.values else {}),
+        }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    from PyQt6.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'pyqt': PYQT_VERSION_STR,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_cases(module: str, names: list[str], extra_args: list[str] = ()) -> list[dict]:
+    results = []
+    for name in names:
+        print(f'{name}...', file=sys.stderr, flush=True)
+        # a fresh process for every case, so the peak memory is the one of that case
+        process = subprocess.run([sys.executable, '-m', module, '--run-case', name, *extra_args], cwd=ROOT,
+                                 env={**os.environ, 'QT_QPA_PLATFORM': 'offscreen'},
+                                 stdout=subprocess.PIPE, text=True)
+        if process.returncode != 0:
+            print(f'{name} failed with exit code {process.returncode}', file=sys.stderr)
+            results.append({'name': name, 'error': process.returncode})
+            continue
+        results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def write_results(suite: str, results: list[dict], output: Optional[Path]) -> Path:
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f'{suite}-{time.strftime("%Y%m%d-%H%M%S")}.json'
+    output.write_text(json.dumps({'suite': suite, 'environment': environment(), 'cases': results},
+                                 ensure_ascii=False, indent=2), encoding='utf-8')
+    return output
+
+
+def print_results(results: list[dict], baseline: Optional[Path] = None):
+    previous = {}
+    if baseline is not None:
+        previous = {case['name']: case for case in json.loads(baseline.read_text(encoding='utf-8'))['cases']}
+    for case in results:
+        if 'error' in case:
+            print(f"{case['name']}: ошибка")
+            continue
+        rss = f", память {case['peak_rss'] / 1024 / 1024:.0f} МБ" if case.get('peak_rss') else ''
+        print(f"{case['name']}: {case['wall_time']:.2f} с{rss}")
+        old_operations = previous.get(case['name'], {}).get('operations', {})
+        for operation, stats in case['operations'].items():
+            if not stats['count']:
+                continue
+            line = (f"  {operation:<24} n={stats['count']:<7} p50={stats['p50']:.3f} p90={stats['p90']:.3f} "
+                    f"p99={stats['p99']:.3f} max={stats['max']:.3f} мс")
+            old = old_operations.get(operation)
+            if old and old.get('p50'):
+                ratio = stats['p50'] / old['p50']
+                line += f"  {ratio - 1:+.0%}" + (' !' if ratio > REGRESSION_RATIO else '')
+            print(line)
+        for name, value in case.get('values', {}).items():
+            print(f'  {name:<24} {value}')
+
+
+@contextmanager
+def working_directory(path: Path):
+    # the app keeps its data relative to the working directory, the cases run in a temporary one
+    sys.path[0:0] = [str(ROOT)]
+    previous = Path.cwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
@@ -0,0 +1,329 @@
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import Recorder, run_cases, write_results, print_results, working_directory
+
+WORDS = ['обзор', 'музыка', 'концерт', 'лекция', 'подкаст', 'стрим', 'трейлер', 'клип', 'урок', 'новости',
+         'review', 'music', 'live', 'tutorial', 'python', 'qt', 'game', 'trailer', 'remix', 'interview']
+HEIGHTS = [144, 240, 360, 480, 720, 1080, 1440, 2160]
+VIDEO_CODECS = ['avc1.640028', 'vp9', 'av01.0.08M.08', 'vp09.00.40.08']
+AUDIO_CODECS = ['mp4a.40.2', 'opus', 'mp4a.40.5']
+PAGES = 20
+PREVIEW_BATCHES = 10
+REPEATS = 20
+
+
+def wait_for(signal, timeout: int = 60000, until=None):
+    from PyQt6.QtCore import QEventLoop, QTimer
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.timeout.connect(loop.quit)
+
+    def received(*args):
+        if until is None or until():
+            loop.quit()
+
+    signal.connect(received)
+    timer.start(timeout)
+    loop.exec()
+    signal.disconnect(received)
+    if not timer.isActive():
+        raise TimeoutError(f'no signal in {timeout} ms')
+    timer.stop()
+
+
+def build_history(path: Path, rows: int, preview: tuple[bytes, bytes]):
+    from migrations import migrate
+    rng = random.Random(rows)
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    now = int(time.time())
+    conn.executemany(
+        "INSERT INTO history(name, channel, duration, url, path, quality, created_at, duration_seconds, "
+        "extractor, video_id) VALUES (?,?,?,?,?,?,?,?,?,?)",
+        ((' '.join(rng.choices(WORDS, k=6)), f'Канал {rng.randrange(300)}', f'{i % 60}:{i % 60:02}',
+          f'https://example.com/watch?v={i}', f'/videos/{i}.mp4', f'{rng.choice(HEIGHTS)}p',
+          now - (rows - i) * 60, i % 3600, 'Bench', str(i))
+         for i in range(rows)))
+    conn.executemany("INSERT INTO history_previews(history_id, small, large) VALUES (?,?,?)",
+                     ((i, *preview) for i in range(1, rows + 1)))
+    conn.commit()
+    conn.close()
+
+
+def synthetic_preview() -> tuple[bytes, bytes]:
+    from PyQt6.QtCore import QBuffer, QByteArray, QIODevice
+    from PyQt6.QtGui import QImage, QPainter, QLinearGradient, QColor
+    from ui.historymodel import scaled_previews
+    image = QImage(1280, 720, QImage.Format.Format_RGB32)
+    gradient = QLinearGradient(0, 0, 1280, 720)
+    gradient.setColorAt(0, QColor('darkblue'))
+    gradient.setColorAt(1, QColor('orange'))
+    painter = QPainter(image)
+    painter.fillRect(image.rect(), gradient)
+    painter.end()
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, 'WEBP')
+    return scaled_previews(data.data())
+
+
+def synthetic_format(index: int, rng: random.Random) -> dict:
+    kind = index % 3
+    height = HEIGHTS[index % len(HEIGHTS)]
+    video = kind != 2
+    audio = kind != 1
+    fmt = {
+        'format_id': str(index),
+        'format': f'{index} - {height}p' if video else f'{index} - audio only',
+        'format_note': f'{height}p' if video else 'medium',
+        'ext': rng.choice(['mp4', 'webm']) if video else rng.choice(['m4a', 'webm']),
+        'protocol': 'https',
+        'url': f'https://rr{index % 9}---sn-bench.example.com/videoplayback?id={index}&' + 'sig=' + 'x' * 600,
+        'vcodec': rng.choice(VIDEO_CODECS) if video else 'none',
+        'acodec': rng.choice(AUDIO_CODECS) if audio else 'none',
+        'width': height * 16 // 9 if video else None,
+        'height': height if video else None,
+        'resolution': f'{height * 16 // 9}x{height}' if video else 'audio only',
+        'fps': rng.choice([24, 30, 60]) if video else None,
+        'dynamic_range': 'SDR' if video else None,
+        'tbr': round(rng.uniform(50, 20000), 3),
+        'vbr': round(rng.uniform(50, 18000), 3) if video else None,
+        'abr': round(rng.uniform(32, 256), 3) if audio else None,
+        'asr': 48000 if audio else None,
+        'audio_channels': 2 if audio else None,
+        'filesize': rng.randrange(10 ** 5, 10 ** 9) if index % 4 else None,
+        'filesize_approx': rng.randrange(10 ** 5, 10 ** 9),
+        'http_headers': {'User-Agent': 'Mozilla/5.0', 'Accept': '*/*', 'Accept-Language': 'en-us,en;q=0.5'},
+    }
+    if index % 5 == 0:
+        # fragmented formats carry a list of their fragments
+        fmt['protocol'] = 'http_dash_segments'
+        fmt['fragments'] = [{'url': f'sq/{n}', 'duration': 5.0} for n in range(200)]
+    return fmt
+
+
+def synthetic_info(formats_count: int) -> dict:
+    rng = random.Random(formats_count)
+    languages = [f'l{n}' for n in range(150)]
+    return {
+        'id': 'bench', 'title': 'Синтетическое видео для замеров', 'extractor': 'bench', 'extractor_key': 'Bench',
+        'webpage_url': 'https://example.com/watch?v=bench', 'thumbnail': None,
+        'uploader': 'Канал', 'uploader_url': 'https://example.com/channel', 'channel_follower_count': 123456,
+        'channel_is_verified': True, 'duration': 3600, 'duration_string': '1:00:00', 'upload_date': '20240101',
+        'like_count': 1000, 'view_count': 100000, 'comment_count': 500,
+        'description': ' '.join(rng.choices(WORDS, k=2000)),
+        'formats': [synthetic_format(index, rng) for index in range(formats_count)],
+        'subtitles': {language: [{'ext': 'vtt', 'url': f'https://example.com/{language}.vtt'}]
+                      for language in languages},
+        'automatic_captions': {language: [{'ext': ext, 'url': f'https://example.com/{language}.{ext}'}
+                                          for ext in ('json3', 'srv1', 'srv2', 'srv3', 'ttml', 'vtt')]
+                               for language in languages},
+    }
+
+
+def history_case(rows: int) -> tuple[Recorder, dict]:
+    from PyQt6.QtCore import QModelIndex
+    from PyQt6.QtWidgets import QApplication, QListView
+    from database import Database
+    from models import HistoryFilter
+    from ui.historymodel import HistoryModel, HistoryDelegate
+
+    app = QApplication([])
+    recorder = Recorder()
+    started = time.perf_counter()
+    Path('data').mkdir()
+    build_history(Path('data') / 'main.db', rows, synthetic_preview())
+    recorder.values['setup_seconds'] = round(time.perf_counter() - started, 3)
+
+    db = Database('data/main.db', start=False)
+    model = HistoryModel(db)
+    view = QListView()
+    view.setItemDelegate(HistoryDelegate(view))
+    view.resize(500, 900)
+    view.show()
+    with recorder.measure('open_database'):
+        db.start()
+        wait_for(db.opened)
+
+    def fetch():
+        if model.canFetchMore(QModelIndex()):
+            model.fetchMore(QModelIndex())
+        wait_for(model.page_fetched)
+
+    with recorder.measure('first_page'):
+        view.setModel(model)
+        fetch()
+        app.processEvents()
+    for _ in range(PAGES):
+        if not model.canFetchMore(QModelIndex()):
+            break
+        with recorder.measure('next_page'):
+            fetch()
+
+    def previews_loaded():
+        return not model.requested_previews
+
+    for batch in range(PREVIEW_BATCHES):
+        # previews of the rows on screen, read from a cold cache every time
+        model.previews.clear()
+        model.requested_previews.clear()
+        view.scrollTo(model.index(batch * model.rowCount() // PREVIEW_BATCHES),
+                      QListView.ScrollHint.PositionAtTop)
+        with recorder.measure('visible_previews'):
+            view.viewport().repaint()
+            if model.requested_previews:
+                wait_for(model.preview_loaded, until=previews_loaded)
+        with recorder.measure('paint'):
+            view.viewport().repaint()
+
+    rng = random.Random(rows)
+    for _ in range(REPEATS):
+        history_filter = HistoryFilter(text=rng.choice(WORDS)[:rng.randrange(2, 5)])
+        with recorder.measure('search'):
+            model.set_filter(history_filter)
+            fetch()
+    for _ in range(REPEATS):
+        with recorder.measure('channel_filter'):
+            model.set_filter(HistoryFilter(channel=f'Канал {rng.randrange(300)}'))
+            fetch()
+
+    model.shutdown()
+    db.close()
+    return recorder, {'rows': rows}
+
+
+def formats_case(formats: int) -> tuple[Recorder, dict]:
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtWidgets import QApplication
+    import main
+
+    app = QApplication([])
+    Path('data').mkdir()
+    info = synthetic_info(formats)
+    recorder = Recorder()
+    window = main.MainWidget()
+    window.show()
+    app.processEvents()
+    for _ in range(REPEATS):
+        with recorder.measure('parse_video_info_finished'):
+            window.parse_video_info_finished('url', info['webpage_url'], info)
+            app.processEvents()
+    window.tabWidget.setCurrentIndex(1)
+    for repeat in range(REPEATS):
+        with recorder.measure('format_kind_filter'):
+            window.formatKindFilter.setCurrentIndex(repeat % 4)
+            app.processEvents()
+    for repeat in range(REPEATS):
+        with recorder.measure('format_sort'):
+            window.qualityTable.sortByColumn(repeat % 8, Qt.SortOrder(repeat % 2))
+            app.processEvents()
+    window.close()
+    return recorder, {'formats': formats, 'info_bytes': len(json.dumps(info))}
+
+
+def progress_stream(job: int, info: dict, calls: int):
+    # what yt-dlp passes to the hook for every received block
+    total = 500 * 1024 * 1024
+    for n in range(calls):
+        yield {
+            'status': 'downloading', 'downloaded_bytes': (n + 1) * total // calls, 'total_bytes': total,
+            'tmpfilename': f'/videos/{job}.mp4.part', 'filename': f'/videos/{job}.mp4',
+            'eta': calls - n, 'speed': 5.0 * 1024 * 1024, 'elapsed': n / 1000, 'ctx_id': None,
+            'info_dict': info,
+        }
+
+
+def progress_case(jobs: int, hook_calls: int, updates: int) -> tuple[Recorder, dict]:
+    from PyQt6.QtWidgets import QApplication
+    from downloads import DownloadWorker
+    from models import Video, JobState, ProgressUpdate
+    import main
+
+    app = QApplication([])
+    Path('data').mkdir()
+    info = synthetic_info(200)
+    recorder = Recorder()
+    window = main.MainWidget()
+    window.show()
+    app.processEvents()
+    job_ids = []
+    for job in range(jobs):
+        video = Video(f'Видео {job}', 'Канал', '1:00:00', f'https://example.com/watch?v={job}', '1080p')
+        job_id = window.queue.add(video, {}, info, paused=True)
+        window.queue.jobs[job_id].state = JobState.RUNNING
+        job_ids.append(job_id)
+    app.processEvents()
+
+    # the worker thread side: every block goes through the hook, a few updates a second reach the GUI
+    worker = DownloadWorker(set())
+    emitted = []
+    worker.progress.connect(lambda job_id, update: emitted.append(update))
+    worker.run_started = time.monotonic()
+    for d in progress_stream(1, info, hook_calls):
+        started = time.perf_counter()
+        worker.hook(1, d)
+        recorder.add('hook', time.perf_counter() - started)
+    recorder.values['hook_updates_emitted'] = len(emitted)
+
+    # the GUI side with every job reporting at once
+    for n in range(updates):
+        job_id = job_ids[n % jobs]
+        update = ProgressUpdate('downloading', 100 * n / updates, 5.0 * 1024 * 1024, updates - n,
+                                f'/videos/{job_id}.mp4.part')
+        with recorder.measure('download_progress'):
+            window.queue.worker_progress(job_id, update)
+        if n % jobs == jobs - 1:
+            with recorder.measure('repaint'):
+                app.processEvents()
+    window.close()
+    return recorder, {'jobs': jobs, 'hook_calls': hook_calls, 'updates': updates}
+
+
+CASES = {
+    'history-1000': (history_case, {'rows': 1000}),
+    'history-10000': (history_case, {'rows': 10000}),
+    'history-100000': (history_case, {'rows': 100000}),
+    'formats-500': (formats_case, {'formats': 500}),
+    'formats-5000': (formats_case, {'formats': 5000}),
+    'progress-burst': (progress_case, {'jobs': 8, 'hook_calls': 200000, 'updates': 5000}),
+}
+
+
+def run_case(name: str):
+    function, params = CASES[name]
+    with tempfile.TemporaryDirectory(prefix='pyqyt-bench-') as directory, working_directory(Path(directory)):
+        recorder, details = function(**params)
+    print(json.dumps(recorder.result(name, details)))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Замеры интерфейса на синтетических данных')
+    parser.add_argument('cases', nargs='*', metavar='CASE', help=f'что замерять, по умолчанию всё: {", ".join(CASES)}')
+    parser.add_argument('-o', '--output', type=Path, help='файл для результатов, по умолчанию benchmarks/results')
+    parser.add_argument('--compare', type=Path, help='файл результатов прошлого запуска для сравнения')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.run_case:
+        run_case(args.run_case)
+        return 0
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f'неизвестные замеры: {", ".join(unknown)}')
+    results = run_cases('benchmarks.gui', args.cases or list(CASES))
+    output = write_results('gui', results, args.output)
+    print_results(results, args.compare)
+    print(f'Результаты: {output}')
+    return 1 if any('error' in case for case in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
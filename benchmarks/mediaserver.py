@@ -0,0 +1,263 @@
+import argparse
+import json
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_SIZE = 32 * 1024 * 1024
+DEFAULT_DURATION = 60
+AUDIO_BITRATE = 128
+CHUNK_SIZE = 64 * 1024
+RANGE = re.compile(r'bytes=(\d*)-(\d*)$')
+VIDEO_PATH = re.compile(r'/api/video/(\w+)$')
+PLAYLIST_PATH = re.compile(r'/api/playlist/(\d+)$')
+MEDIA_PATH = re.compile(r'/media/(\w+)/(video\.mp4|audio\.m4a|muxed\.mp4)$')
+CONTENT_TYPES = {'.mp4': 'video/mp4', '.m4a': 'audio/mp4'}
+
+
+def find_ffmpeg(location: Optional[str]) -> Optional[str]:
+    if location and Path(location).is_dir():
+        location = str(Path(location) / 'ffmpeg')
+    return location if location and Path(location).exists() else shutil.which('ffmpeg')
+
+
+def media_directory(size: int, duration: int, ffmpeg: Optional[str]) -> Path:
+    # encoding takes far longer than a benchmark run, so the media is kept for the next runs
+    return Path(tempfile.gettempdir()) / f'pyqyt-media-{size}-{duration}-{"real" if ffmpeg else "random"}'
+
+
+def generate_media(directory: Path, size: int, duration: int, ffmpeg: Optional[str]) -> dict:
+    # real media when ffmpeg is there, so merging and conversions have something to work on,
+    # random bytes of the same size otherwise
+    description = directory / 'media.json'
+    if description.exists():
+        return json.loads(description.read_text())
+    directory.mkdir(parents=True, exist_ok=True)
+    media = make_media(directory, size, duration, ffmpeg)
+    description.write_text(json.dumps(media))
+    return media
+
+
+def make_media(directory: Path, size: int, duration: int, ffmpeg: Optional[str]) -> dict:
+    video_bitrate = max(100, size * 8 // duration // 1000 - AUDIO_BITRATE)
+    if ffmpeg:
+        for codec in ('libx264', 'mpeg4'):
+            video = subprocess.run([ffmpeg, '-y', '-v', 'error', '-f', 'lavfi', '-i',
+                                    f'testsrc2=size=1280x720:rate=25:duration={duration}', '-c:v', codec,
+                                    '-b:v', f'{video_bitrate}k', '-pix_fmt', 'yuv420p', '-an',
+                                    str(directory / 'video.mp4')])
+            if video.returncode == 0:
+                break
+        else:
+            raise RuntimeError('ffmpeg could not encode the test video')
+        subprocess.run([ffmpeg, '-y', '-v', 'error', '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+                        '-c:a', 'aac', '-b:a', f'{AUDIO_BITRATE}k', str(directory / 'audio.m4a')], check=True)
+        return {'video_codec': 'avc1.64001f' if codec == 'libx264' else 'mp4v.20.9', 'audio_codec': 'mp4a.40.2',
+                'separate': True}
+    rng = random.Random(size)
+    with open(directory / 'muxed.mp4', 'wb') as media:
+        for _ in range(0, size, CHUNK_SIZE):
+            media.write(rng.randbytes(CHUNK_SIZE))
+        media.truncate(size)
+    return {'video_codec': 'avc1.64001f', 'audio_codec': 'mp4a.40.2', 'separate': False}
+
+
+class MediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, directory: Path, media: dict, duration: int, latency: float = 0,
+                 bandwidth: Optional[int] = None, failure_rate: float = 0, seed: int = 0):
+        super().__init__(address, MediaHandler)
+        self.directory = directory
+        self.media = media
+        self.duration = duration
+        # seconds before every response, bytes per second of every connection, share of failed media requests
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.bytes_sent = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def failure(self) -> Optional[str]:
+        # half of the failures are errors, the other half are responses cut in the middle
+        with self.lock:
+            self.requests += 1
+            if self.rng.random() >= self.failure_rate:
+                return None
+            self.failures += 1
+            return 'error' if self.rng.random() < 0.5 else 'cut'
+
+    def video(self, video_id: str) -> dict:
+        base = self.base_url
+        formats = []
+        if self.media['separate']:
+            formats.append({'format_id': 'video', 'url': f'{base}/media/{video_id}/video.mp4', 'ext': 'mp4',
+                            'vcodec': self.media['video_codec'], 'acodec': 'none', 'width': 1280, 'height': 720,
+                            'fps': 25, 'filesize': (self.directory / 'video.mp4').stat().st_size})
+            formats.append({'format_id': 'audio', 'url': f'{base}/media/{video_id}/audio.m4a', 'ext': 'm4a',
+                            'vcodec': 'none', 'acodec': self.media['audio_codec'], 'abr': AUDIO_BITRATE,
+                            'filesize': (self.directory / 'audio.m4a').stat().st_size})
+        else:
+            formats.append({'format_id': 'muxed', 'url': f'{base}/media/{video_id}/muxed.mp4', 'ext': 'mp4',
+                            'vcodec': self.media['video_codec'], 'acodec': self.media['audio_codec'],
+                            'width': 1280, 'height': 720, 'fps': 25,
+                            'filesize': (self.directory / 'muxed.mp4').stat().st_size})
+        return {'id': video_id, 'title': f'Видео {video_id}', 'uploader': 'Тестовый сервер',
+                'duration': self.duration, 'formats': formats}
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: MediaServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def respond(self, send_body: bool):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if match := VIDEO_PATH.match(self.path):
+            self.send_json(self.server.video(match[1]), send_body)
+        elif match := PLAYLIST_PATH.match(self.path):
+            count = int(match[1])
+            self.send_json({'id': f'playlist{count}', 'title': f'Плейлист из {count}',
+                            'entries': [f'p{count}x{n}' for n in range(count)]}, send_body)
+        elif self.path == '/api/stats':
+            with self.server.lock:
+                stats = {'requests': self.server.requests, 'failures': self.server.failures,
+                         'bytes_sent': self.server.bytes_sent}
+            self.send_json(stats, send_body)
+        elif match := MEDIA_PATH.match(self.path):
+            self.send_media(self.server.directory / match[2], send_body)
+        else:
+            self.send_error(404)
+
+    def send_json(self, data: dict, send_body: bool):
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_media(self, path: Path, send_body: bool):
+        if not path.exists():
+            self.send_error(404)
+            return
+        size = path.stat().st_size
+        start, end = 0, size - 1
+        header = self.headers.get('Range')
+        if header:
+            match = RANGE.match(header.strip())
+            if not match or not (match[1] or match[2]):
+                self.send_error(416)
+                return
+            if match[1]:
+                start = int(match[1])
+                end = min(int(match[2]), size - 1) if match[2] else size - 1
+            else:
+                start = max(0, size - int(match[2]))
+            if start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        failure = self.server.failure() if send_body else None
+        if failure == 'error':
+            self.send_error(503)
+            return
+        length = end - start + 1
+        self.send_response(206 if header else 200)
+        self.send_header('Content-Type', CONTENT_TYPES.get(path.suffix, 'application/octet-stream'))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(length))
+        if header:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if not send_body:
+            return
+        # a failing response is cut in the middle, the client has to resume it with a range request
+        self.send_file(path, start, length // 2 if failure == 'cut' else length)
+        if failure == 'cut':
+            self.close_connection = True
+
+    def send_file(self, path: Path, start: int, length: int):
+        bandwidth = self.server.bandwidth
+        started = time.monotonic()
+        sent = 0
+        with open(path, 'rb') as media:
+            media.seek(start)
+            while sent < length:
+                chunk = media.read(min(CHUNK_SIZE, length - sent))
+                if not chunk:
+                    break
+                try:
+                    self.wfile.write(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                sent += len(chunk)
+                with self.server.lock:
+                    self.server.bytes_sent += len(chunk)
+                if bandwidth:
+                    ahead = sent / bandwidth - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Локальный сервер тестовых видео для замеров скорости загрузки')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='0 — любой свободный')
+    parser.add_argument('--size', type=float, default=DEFAULT_SIZE / 1024 / 1024, help='размер видео, МБ')
+    parser.add_argument('--duration', type=int, default=DEFAULT_DURATION, help='длительность видео, с')
+    parser.add_argument('--latency', type=float, default=0, help='задержка перед каждым ответом, мс')
+    parser.add_argument('--bandwidth', type=float, help='скорость одного соединения, МБ/с')
+    parser.add_argument('--failure-rate', type=float, default=0, help='доля оборванных запросов, от 0 до 1')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ffmpeg-location', help='ffmpeg для настоящих видео, иначе случайные данные')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    size = int(args.size * 1024 * 1024)
+    ffmpeg = find_ffmpeg(args.ffmpeg_location)
+    directory = media_directory(size, args.duration, ffmpeg)
+    media = generate_media(directory, size, args.duration, ffmpeg)
+    server = MediaServer((args.host, args.port), directory, media, args.duration, args.latency / 1000,
+                         int(args.bandwidth * 1024 * 1024) if args.bandwidth else None, args.failure_rate, args.seed)
+    # the first line tells the harness where the server is
+    print(json.dumps({'url': server.base_url, **media}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.common import ROOT, Recorder, run_cases, write_results, print_results, working_directory
+from benchmarks.mediaserver import find_ffmpeg
+
+FIXTURE_IE_KEY = 'Fixture'
+TIMEOUT = 600
+
+CASES = {
+    'single': {'jobs': 1, 'workers': 1},
+    'parallel': {'workers': 4},
+    'segmented': {'jobs': 1, 'workers': 1, 'connections': 4},
+    'playlist': {'playlist': True, 'workers': 4},
+}
+
+
+def fixture_extractor():
+    # yt_dlp is imported by the functions using it, as in the rest of the app
+    from yt_dlp.extractor.common import InfoExtractor
+
+    class FixtureIE(InfoExtractor):
+        # videos and playlists of benchmarks.mediaserver, described by its json api
+        _VALID_URL = r'(?P<base>https?://[^/]+)/(?P<kind>watch|playlist)/(?P<id>\w+)'
+
+        def _real_extract(self, url):
+            base, kind, item_id = self._match_valid_url(url).group('base', 'kind', 'id')
+            if kind == 'playlist':
+                data = self._download_json(f'{base}/api/playlist/{item_id}', item_id)
+                return self.playlist_result([self.url_result(f'{base}/watch/{entry}', FIXTURE_IE_KEY, entry)
+                                             for entry in data['entries']], data['id'], data['title'])
+            return self._download_json(f'{base}/api/video/{item_id}', item_id)
+
+    return FixtureIE
+
+
+def extract(url: str, flat: bool = False) -> dict:
+    import yt_dlp
+    from engine import ytdlp_log
+    with yt_dlp.YoutubeDL({'extract_flat': 'in_playlist' if flat else False, 'logger': ytdlp_log}) as ydl:
+        ydl.add_info_extractor(fixture_extractor()())
+        return ydl.extract_info(url, download=False, ie_key=FIXTURE_IE_KEY)
+
+
+def fixture_cache(path: str):
+    from cache import InfoCache
+
+    class FixtureCache(InfoCache):
+        # the playlist resolver makes its own YoutubeDL, which does not know the fixture extractor
+        def extract_info(self, ydl, url, refresh=False):
+            if not refresh:
+                info = self.get(url)
+                if info is not None:
+                    return info
+            ydl.add_info_extractor(fixture_extractor()())
+            info = ydl.extract_info(url, download=False, ie_key=FIXTURE_IE_KEY)
+            self.put(url, info)
+            return info
+
+    return FixtureCache(path)
+
+
+def start_server(args: argparse.Namespace, ffmpeg: Optional[str]) -> tuple[subprocess.Popen, dict]:
+    command = [sys.executable, '-m', 'benchmarks.mediaserver', '--size', str(args.size),
+               '--duration', str(args.duration), '--latency', str(args.latency),
+               '--failure-rate', str(args.failure_rate), '--seed', str(args.seed)]
+    if args.bandwidth:
+        command += ['--bandwidth', str(args.bandwidth)]
+    if ffmpeg:
+        command += ['--ffmpeg-location', ffmpeg]
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    return server, json.loads(server.stdout.readline())
+
+
+def server_stats(base_url: str) -> dict:
+    with urllib.request.urlopen(f'{base_url}/api/stats') as response:
+        return json.load(response)
+
+
+def run_downloads(args: argparse.Namespace, workers: int, jobs: int, connections: Optional[int],
+                  playlist: bool) -> tuple[Recorder, dict]:
+    from PyQt6.QtCore import QCoreApplication, QEventLoop, QTimer
+    from downloads import DownloadQueue
+    from engine import download_options, entry_url
+    from formats import VIDEO, plan_formats
+    from models import Video
+    from playlists import PlaylistResolver
+    from postprocessing import PostprocessPool
+
+    app = QCoreApplication([])
+    ffmpeg = find_ffmpeg(args.ffmpeg_location)
+    server, media = start_server(args, ffmpeg)
+    base = media['url']
+    # random bytes can not be merged or converted, they are downloaded as they are
+    container = args.container if media['separate'] else None
+    recorder = Recorder()
+    queue = DownloadQueue(workers, PostprocessPool(args.postprocess_jobs))
+    added: dict[int, float] = {}
+    done: dict[int, float] = {}
+    unresolved = []
+    expected = [jobs]
+    loop = QEventLoop()
+
+    def planned_options(info):
+        # a single video is planned with its formats, playlist entries get the options of the whole batch
+        plan = plan_formats(VIDEO, container, None, '<=', info['formats'] if info else None,
+                            info.get('duration') if info else None)
+        options = download_options('out', plan, connections, ffmpeg)
+        if args.retries is not None:
+            options['retries'] = args.retries
+        return options
+
+    def add(entry, info, options, quality):
+        # from the submission of the batch, the resolver has enough workers to start every entry at once
+        recorder.add('extraction', time.perf_counter() - submitted)
+        url = entry_url(entry)
+        video = Video(info['title'], info.get('uploader') or '', '', url, quality, extractor=FIXTURE_IE_KEY,
+                      video_id=info['id'])
+        job_id = queue.add(video, options or planned_options(info), info)
+        added[job_id] = time.perf_counter()
+
+    def check_done():
+        if len(done) + len(unresolved) == expected[0]:
+            loop.quit()
+
+    def job_over(job_id):
+        done[job_id] = time.perf_counter()
+        check_done()
+
+    def entry_failed(entry, message):
+        print(f'{entry_url(entry)}: {message}', file=sys.stderr)
+        unresolved.append(entry)
+        check_done()
+
+    queue.job_finished.connect(job_over)
+    queue.job_failed.connect(job_over)
+    # entries are resolved the way the window resolves the entries of a playlist
+    resolver = PlaylistResolver(fixture_cache('cache.db'))
+    resolver.entry_resolved.connect(add)
+    resolver.entry_failed.connect(entry_failed)
+    # the window imports the extractors once it is shown, long before the first lookup
+    from yt_dlp.extractor import gen_extractor_classes
+    gen_extractor_classes()
+
+    started = time.perf_counter()
+    if playlist:
+        with recorder.measure('playlist_extraction'):
+            entries = extract(f'{base}/playlist/{jobs}', flat=True)['entries']
+        expected[0] = len(entries)
+        submitted = time.perf_counter()
+        resolver.resolve(entries, planned_options(None), 'best')
+    else:
+        submitted = time.perf_counter()
+        resolver.resolve([{'url': f'{base}/watch/v{n}'} for n in range(jobs)], {}, 'best')
+    QTimer.singleShot(TIMEOUT * 1000, loop.quit)
+    loop.exec()
+    wall_time = time.perf_counter() - started
+
+    total_bytes = 0
+    retries = 0
+    failed = len(unresolved)
+    for job in queue.jobs.values():
+        metrics = job.metrics
+        total_bytes += metrics.bytes
+        retries += metrics.retries
+        if job.id not in done or job.error:
+            failed += 1
+        if metrics.ttfb is not None:
+            recorder.add('ttfb', metrics.ttfb)
+        recorder.add('download', job.download_time)
+        if metrics.postprocess_time is not None:
+            recorder.add('postprocess', metrics.postprocess_time)
+        if job.id in done:
+            recorder.add('job', done[job.id] - added[job.id])
+    stats = server_stats(base)
+    recorder.values.update({
+        'throughput_mib_s': round(total_bytes / wall_time / 1024 / 1024, 2),
+        'bytes': total_bytes,
+        'end_to_end_seconds': round(wall_time, 3),
+        'failed_jobs': failed,
+        'retries': retries,
+        'server_requests': stats['requests'],
+        'server_failures': stats['failures'],
+    })
+    resolver.shutdown()
+    queue.shutdown()
+    server.terminate()
+    server.wait()
+    app.quit()
+    return recorder, {'jobs': expected[0], 'workers': workers, 'connections': connections, 'container': container,
+                      'real_media': media['separate'], 'size_mib': args.size, 'latency_ms': args.latency,
+                      'bandwidth_mib_s': args.bandwidth, 'failure_rate': args.failure_rate,
+                      'retries': args.retries}
+
+
+def run_case(name: str, args: argparse.Namespace):
+    case = CASES[name]
+    with tempfile.TemporaryDirectory(prefix='pyqyt-throughput-') as directory, \
+            working_directory(Path(directory)):
+        recorder, details = run_downloads(args, case.get('workers', args.workers),
+                                          case.get('jobs', args.playlist_size if case.get('playlist') else args.jobs),
+                                          case.get('connections', args.connections), case.get('playlist', False))
+    print(json.dumps(recorder.result(name, details)))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Замеры скорости загрузки с локального сервера без сети')
+    parser.add_argument('cases', nargs='*', metavar='CASE', help=f'что замерять, по умолчанию всё: {", ".join(CASES)}')
+    parser.add_argument('-o', '--output', type=Path, help='файл для результатов, по умолчанию benchmarks/results')
+    parser.add_argument('--compare', type=Path, help='файл результатов прошлого запуска для сравнения')
+    parser.add_argument('--size', type=float, default=32, help='размер одного видео, МБ')
+    parser.add_argument('--duration', type=int, default=60, help='длительность видео, с')
+    parser.add_argument('--latency', type=float, default=0, help='задержка сервера перед ответом, мс')
+    parser.add_argument('--bandwidth', type=float, help='скорость одного соединения, МБ/с')
+    parser.add_argument('--failure-rate', type=float, default=0, help='доля оборванных запросов, от 0 до 1')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-R', '--retries', type=int,
+                        help='повторов оборванного запроса, по умолчанию как в приложении (без повторов)')
+    parser.add_argument('-j', '--jobs', type=int, default=4, help='загрузок в замере parallel')
+    parser.add_argument('--playlist-size', type=int, default=8, help='видео в замере playlist')
+    parser.add_argument('--workers', type=int, default=4, help='одновременных загрузок')
+    parser.add_argument('-N', '--connections', type=int, help='соединений на одну загрузку')
+    parser.add_argument('--postprocess-jobs', type=int, help='количество одновременных конвертаций')
+    parser.add_argument('-f', '--format', dest='container', default='mp4',
+                        help='формат файла; mp4 только объединяет дорожки, mkv и webm перекодируют')
+    parser.add_argument('--ffmpeg-location', help='папка или путь к ffmpeg, по умолчанию bin или PATH')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f'неизвестные замеры: {", ".join(unknown)}')
+    return args
+
+
+def case_options(args: argparse.Namespace) -> list[str]:
+    # the cases run in other directories, so the ffmpeg path is made absolute
+    options = ['--size', str(args.size), '--duration', str(args.duration), '--latency', str(args.latency),
+               '--failure-rate', str(args.failure_rate), '--seed', str(args.seed), '--jobs', str(args.jobs),
+               '--playlist-size', str(args.playlist_size), '--workers', str(args.workers),
+               '--format', args.container, '--ffmpeg-location', str(Path(args.ffmpeg_location).resolve())]
+    for flag, value in (('--bandwidth', args.bandwidth), ('--connections', args.connections), ('--retries', args.retries),
+                        ('--postprocess-jobs', args.postprocess_jobs)):
+        if value is not None:
+            options += [flag, str(value)]
+    return options
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.ffmpeg_location is None:
+        from engine import default_ffmpeg_location
+        args.ffmpeg_location = default_ffmpeg_location()
+    if args.run_case:
+        run_case(args.run_case, args)
+        return 0
+    results = run_cases('benchmarks.throughput', args.cases or list(CASES), case_options(args))
+    output = write_results('throughput', results, args.output)
+    print_results(results, args.compare)
+    print(f'Результаты: {output}')
+    return 1 if any('error' in case for case in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
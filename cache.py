@@ -0,0 +1,120 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import yt_dlp
+
+# format urls of most sites expire in a few hours
+DEFAULT_TTL = 3 * 60 * 60
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+def canonical_key(url: str) -> Optional[str]:
+    from yt_dlp.extractor import gen_extractor_classes
+    for ie in gen_extractor_classes():
+        if ie.suitable(url):
+            temp_id = ie.get_temp_id(url)
+            return f'{ie.ie_key()}:{temp_id}' if temp_id else None
+    return None
+
+
+def info_key(info: dict) -> Optional[str]:
+    if info.get('extractor_key') and info.get('id'):
+        return f"{info['extractor_key']}:{info['id']}"
+    return None
+
+
+class InfoCache:
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, max_size: int = DEFAULT_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        # the cache is shared by the info worker and the playlist resolver threads
+        self.lock = threading.Lock()
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # opened by the first lookup rather than while the window is starting; only used under the lock
+        if self._conn is None:
+            self._conn = self.connect()
+        return self._conn
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # the thumbnail store writes to the same file from its own threads
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS `info_cache` (
+            `key` TEXT PRIMARY KEY,
+            `data` BLOB NOT NULL,
+            `size` INTEGER NOT NULL,
+            `created` REAL NOT NULL,
+            `accessed` REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS `info_cache_accessed` ON `info_cache` (`accessed`);
+            CREATE TABLE IF NOT EXISTS `info_cache_urls` (
+            `url` TEXT PRIMARY KEY,
+            `key` TEXT NOT NULL
+            );""")
+        conn.commit()
+        return conn
+
+    def get(self, url: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT key FROM info_cache_urls WHERE url = ?", (url,)).fetchone()
+        key = row[0] if row else canonical_key(url)
+        if key is None:
+            return None
+        with self.lock:
+            row = self.conn.execute("SELECT data, created FROM info_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            data, created = row
+            if time.time() - created > self.ttl:
+                self.conn.execute("DELETE FROM info_cache WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE info_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+        return json.loads(zlib.decompress(data))
+
+    def put(self, url: str, info: dict):
+        key = info_key(info) or canonical_key(url)
+        if key is None:
+            return
+        from yt_dlp import YoutubeDL
+        data = zlib.compress(json.dumps(YoutubeDL.sanitize_info(info)).encode())
+        now = time.time()
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO info_cache(key, data, size, created, accessed) "
+                              "VALUES (?,?,?,?,?)", (key, data, len(data), now, now))
+            self.conn.execute("INSERT OR REPLACE INTO info_cache_urls(url, key) VALUES (?,?)", (url, key))
+            self.evict()
+            self.conn.commit()
+
+    def evict(self):
+        total, = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM info_cache").fetchone()
+        if total <= self.max_size:
+            return
+        self.conn.execute("DELETE FROM info_cache WHERE created < ?", (time.time() - self.ttl,))
+        total, = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM info_cache").fetchone()
+        for key, size in self.conn.execute("SELECT key, size FROM info_cache ORDER BY accessed").fetchall():
+            if total <= self.max_size:
+                break
+            self.conn.execute("DELETE FROM info_cache WHERE key = ?", (key,))
+            total -= size
+        self.conn.execute("DELETE FROM info_cache_urls WHERE key NOT IN (SELECT key FROM info_cache)")
+
+    def extract_info(self, ydl: 'yt_dlp.YoutubeDL', url: str, refresh: bool = False) -> dict:
+        if not refresh:
+            info = self.get(url)
+            if info is not None:
+                return info
+        info = ydl.extract_info(url, download=False)
+        self.put(url, info)
+        return info
@@ -0,0 +1,122 @@
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Optional
+
+import yt_dlp
+
+from engine import FFMPEG_THREADS, FFMPEG_NICE, default_workers_count, default_ffmpeg_location, download, \
+    download_options, entry_url, flat_entries, postprocess_executor, run_postprocessors
+from formats import VIDEO, AUDIO, VIDEO_ONLY, plan_formats
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Скачивание видео без графического интерфейса')
+    parser.add_argument('urls', nargs='*', metavar='URL', help='ссылки на видео, плейлисты или каналы')
+    parser.add_argument('-a', '--batch-file', help='файл со ссылками, по одной в строке, "-" для stdin')
+    parser.add_argument('-o', '--output', default=str(Path.home() / 'Downloads'), help='папка для сохранения')
+    parser.add_argument('-q', '--quality', default='1080p', help='наибольшее качество, например 720p, или best')
+    sound = parser.add_mutually_exclusive_group()
+    sound.add_argument('--audio-only', dest='sound', action='store_const', const=AUDIO, default=VIDEO,
+                       help='только аудио')
+    sound.add_argument('--video-only', dest='sound', action='store_const', const=VIDEO_ONLY,
+                       help='только видео')
+    parser.add_argument('-f', '--format', dest='container', help='формат файла: mp4, webm, mp3, flac, opus, wav')
+    parser.add_argument('-j', '--jobs', type=int, default=default_workers_count(),
+                        help='количество одновременных загрузок')
+    parser.add_argument('-N', '--connections', type=int, help='соединений на одну загрузку (турбо режим)')
+    parser.add_argument('--postprocess-jobs', type=int, help='количество одновременных конвертаций')
+    parser.add_argument('--ffmpeg-location', default=default_ffmpeg_location())
+    parser.add_argument('--ffmpeg-threads', type=int, default=FFMPEG_THREADS)
+    parser.add_argument('--ffmpeg-nice', type=int, default=FFMPEG_NICE)
+    args = parser.parse_args(argv)
+    if not args.urls and not args.batch_file:
+        parser.error('нужна хотя бы одна ссылка или файл со ссылками')
+    return args
+
+
+def read_batch_file(name: str) -> list[str]:
+    lines = sys.stdin.readlines() if name == '-' else Path(name).read_text(encoding='utf-8').splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith('#')]
+
+
+def parse_height(quality: str) -> Optional[int]:
+    height = quality.lower().removesuffix('p')
+    return int(height) if height.isdigit() else None
+
+
+def expand(url: str) -> list[tuple[str, Optional[dict]]]:
+    # playlists are only listed here, a single video comes with its full info
+    with yt_dlp.YoutubeDL({'quiet': True, 'extract_flat': 'in_playlist'}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    if info.get('_type') == 'playlist':
+        return [(entry_url(entry), None) for entry in flat_entries(info)]
+    return [(info.get('webpage_url') or url, info)]
+
+
+def fetch(url: str, info: Optional[dict], args: argparse.Namespace) -> tuple[Optional[str], dict]:
+    if info is None:
+        with yt_dlp.YoutubeDL({'quiet': True, 'noplaylist': True}) as ydl:
+            info = ydl.extract_info(url, download=False)
+    plan = plan_formats(args.sound, args.container, parse_height(args.quality), '<=',
+                        info.get('formats'), info.get('duration'))
+    options = download_options(args.output, plan, args.connections, args.ffmpeg_location)
+    options.update({'quiet': True, 'noprogress': True})
+    # conversions are left to the process pool, so this thread can take the next download
+    postprocessors = options.pop('postprocessors', [])
+    paths = []
+
+    def hook(d):
+        if d['status'] == 'finished':
+            paths.append(d.get('info_dict', {}).get('filepath') or d.get('filename'))
+
+    download(url, options, info, hook)
+    return (paths[-1] if paths else None), {'postprocessors': postprocessors, 'title': info.get('title') or url}
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    urls = list(args.urls)
+    if args.batch_file:
+        urls.extend(read_batch_file(args.batch_file))
+
+    failed = 0
+    items = []
+    for url in urls:
+        try:
+            items.extend(expand(url))
+        except yt_dlp.utils.YoutubeDLError:
+            # yt-dlp has already printed the reason
+            print(f'Ошибка: {url}', file=sys.stderr)
+            failed += 1
+
+    postprocess = postprocess_executor(args.postprocess_jobs, args.ffmpeg_threads, args.ffmpeg_nice)
+    with ThreadPoolExecutor(max(1, args.jobs)) as downloads, postprocess:
+        pending: dict[Future, str] = {downloads.submit(fetch, url, info, args): url for url, info in items}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    result = future.result()
+                except yt_dlp.utils.YoutubeDLError:
+                    # yt-dlp has already printed the reason
+                    print(f'Ошибка: {url}', file=sys.stderr)
+                    failed += 1
+                    continue
+                if isinstance(result, str):
+                    print(f'Скачано: {result}')
+                    continue
+                path, details = result
+                if path and details['postprocessors']:
+                    converted = postprocess.submit(run_postprocessors, path, details['postprocessors'],
+                                                   args.ffmpeg_location, args.ffmpeg_threads)
+                    pending[converted] = url
+                else:
+                    print(f'Скачано: {path or details["title"]}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+import dataclasses
+import json
+import re
+import sqlite3
+import time
+from typing import Optional, Callable
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QThread, QTimer, QMetaObject, Qt
+
+from migrations import migrate
+from models import HistoryFilter, DownloadJob, Video, JobState
+
+HISTORY_COLUMNS = 'id, name, channel, duration, url, path, quality'
+# writes coming in this interval are committed in one transaction
+COMMIT_INTERVAL = 200
+MAX_BATCH_SIZE = 500
+
+
+def fts_query(text: str) -> Optional[str]:
+    # every word is matched as a prefix, so results show up while the word is still being typed
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def history_query(history_filter: HistoryFilter, before_id: Optional[int] = None,
+                  entry_id: Optional[int] = None, limit: Optional[int] = None) -> tuple[str, list]:
+    conditions = []
+    params = []
+    match = fts_query(history_filter.text)
+    if match:
+        conditions.append("id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)")
+        params.append(match)
+    if history_filter.channel:
+        conditions.append("channel = ?")
+        params.append(history_filter.channel)
+    if history_filter.quality:
+        conditions.append("quality = ?")
+        params.append(history_filter.quality)
+    if history_filter.date_from is not None:
+        conditions.append("created_at >= ?")
+        params.append(history_filter.date_from)
+    if history_filter.date_to is not None:
+        conditions.append("created_at < ?")
+        params.append(history_filter.date_to)
+    if before_id is not None:
+        conditions.append("id < ?")
+        params.append(before_id)
+    if entry_id is not None:
+        conditions.append("id = ?")
+        params.append(entry_id)
+
+    query = f"SELECT {HISTORY_COLUMNS} FROM history"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY id DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+
+def previews_query(entry_ids: list[int], large: bool) -> tuple[str, list]:
+    column = 'large' if large else 'small'
+    query = (f"SELECT history_id, {column} FROM history_previews "
+             f"WHERE history_id IN ({', '.join('?' * len(entry_ids))})")
+    return query, list(entry_ids)
+
+
+def preview_insert(entry_id: int, small: bytes, large: bytes) -> tuple[str, tuple]:
+    # previews of files left from deleted entries are not saved
+    query = ("INSERT OR REPLACE INTO history_previews(history_id, small, large) "
+             "SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM history WHERE id = ?)")
+    return query, (entry_id, small, large, entry_id)
+
+
+def completed_download_query(extractor: str, video_id: str, quality: str) -> tuple[str, list]:
+    query = (f"SELECT {HISTORY_COLUMNS} FROM history WHERE id = (SELECT history_id FROM completed_downloads "
+             f"WHERE extractor = ? AND video_id = ? AND quality = ?)")
+    return query, [extractor, video_id, quality]
+
+
+def job_params(job: DownloadJob) -> tuple:
+    return job.state.name, job.progress, json.dumps(sorted(job.part_files))
+
+
+def new_job_params(job: DownloadJob) -> tuple:
+    video = dataclasses.asdict(job.video)
+    return (json.dumps(video), json.dumps(job.options)) + job_params(job) + (int(time.time()),)
+
+
+def metrics_insert(job: DownloadJob, history_id: Optional[int], workers: int) -> tuple[str, tuple]:
+    metrics = job.metrics
+    finished_at = time.time()
+    avg_speed = metrics.bytes / job.download_time if job.download_time else None
+    query = ("INSERT INTO job_metrics(history_id, url, extractor, host, state, bytes, started_at, finished_at, "
+             "wall_time, download_time, ttfb, avg_speed, peak_speed, postprocess_time, retries, workers) "
+             "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)")
+    started_at = metrics.started_at or finished_at
+    return query, (history_id, job.video.url, job.video.extractor or None, metrics.host, job.state.name,
+                   metrics.bytes, started_at, finished_at, finished_at - started_at, job.download_time,
+                   metrics.ttfb, avg_speed, metrics.peak_speed, metrics.postprocess_time, metrics.retries, workers)
+
+
+def metrics_summary_query(since: float) -> tuple[str, list]:
+    query = ("SELECT COUNT(*), COALESCE(SUM(state != 'DONE'), 0), COALESCE(SUM(bytes), 0), "
+             "COALESCE(SUM(download_time), 0), AVG(ttfb), COALESCE(SUM(retries), 0), AVG(postprocess_time) "
+             "FROM job_metrics WHERE finished_at >= ?")
+    return query, [since]
+
+
+def metrics_intervals_query(since: float) -> tuple[str, list]:
+    query = "SELECT started_at, download_time, workers FROM job_metrics WHERE finished_at >= ? ORDER BY started_at"
+    return query, [since]
+
+
+def slow_extractors_query(since: float, limit: int) -> tuple[str, list]:
+    # sources without an extractor name (direct links) are grouped by host
+    query = ("SELECT COALESCE(extractor, host, '?') AS source, COUNT(*), SUM(bytes) / SUM(download_time), "
+             "AVG(ttfb), SUM(retries) FROM job_metrics "
+             "WHERE finished_at >= ? AND state = 'DONE' AND download_time > 0 "
+             "GROUP BY source ORDER BY SUM(bytes) / SUM(download_time) LIMIT ?")
+    return query, [since, limit]
+
+
+def job_from_record(row) -> tuple[int, Video, dict, JobState, float, set[str]]:
+    record_id, video, options, state, progress, part_files = row
+    video = json.loads(video)
+    # jobs saved by older versions still have the thumbnail field, thumbnails are in the thumbnail store now
+    video.pop('thumbnail', None)
+    return record_id, Video(**video), json.loads(options), JobState[state], progress, \
+        set(json.loads(part_files))
+
+
+class DatabaseWorker(QObject):
+    query_requested = pyqtSignal(int, str, object)
+    execute_requested = pyqtSignal(int, str, object)
+    execute_many_requested = pyqtSignal(int, str, object)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+    opened = pyqtSignal()
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+        self.commit_timer: Optional[QTimer] = None
+        self.pending_writes = 0
+        self.query_requested.connect(self.query)
+        self.execute_requested.connect(self.execute)
+        self.execute_many_requested.connect(self.execute_many)
+
+    @pyqtSlot()
+    def open(self):
+        # statements are built from a few fixed templates, so they stay prepared in the statement cache
+        self.conn = sqlite3.connect(self.path, cached_statements=256)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        migrate(self.conn)
+        self.commit_timer = QTimer()
+        self.commit_timer.setSingleShot(True)
+        self.commit_timer.setInterval(COMMIT_INTERVAL)
+        self.commit_timer.timeout.connect(self.commit)
+        self.opened.emit()
+
+    @pyqtSlot(int, str, object)
+    def query(self, request_id, sql, params):
+        try:
+            rows = self.conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            self.failed.emit(request_id, str(e))
+        else:
+            self.finished.emit(request_id, rows)
+
+    @pyqtSlot(int, str, object)
+    def execute(self, request_id, sql, params):
+        try:
+            cur = self.conn.execute(sql, params)
+        except sqlite3.Error as e:
+            self.failed.emit(request_id, str(e))
+            return
+        self.written(1)
+        self.finished.emit(request_id, cur.lastrowid)
+
+    @pyqtSlot(int, str, object)
+    def execute_many(self, request_id, sql, params_list):
+        try:
+            cur = self.conn.executemany(sql, params_list)
+        except sqlite3.Error as e:
+            self.failed.emit(request_id, str(e))
+            return
+        self.written(len(params_list))
+        self.finished.emit(request_id, cur.rowcount)
+
+    def written(self, count):
+        self.pending_writes += count
+        if self.pending_writes >= MAX_BATCH_SIZE:
+            self.commit()
+        elif not self.commit_timer.isActive():
+            self.commit_timer.start()
+
+    @pyqtSlot()
+    def commit(self):
+        self.commit_timer.stop()
+        self.pending_writes = 0
+        self.conn.commit()
+
+    @pyqtSlot()
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class Database(QObject):
+    error = pyqtSignal(str)
+    opened = pyqtSignal()
+
+    def __init__(self, path: str, start: bool = True):
+        super().__init__()
+        # request id -> callbacks for the result and for the error message
+        self.callbacks: dict[int, tuple[Optional[Callable], Optional[Callable[[str], None]]]] = {}
+        self.last_request_id = 0
+        self.worker_thread = QThread()
+        self.worker = DatabaseWorker(path)
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.open)
+        self.worker.finished.connect(self.request_finished)
+        self.worker.failed.connect(self.request_failed)
+        self.worker.opened.connect(self.opened)
+        if start:
+            self.worker_thread.start()
+
+    def start(self):
+        # requests made before are queued and run once the database is open
+        self.worker_thread.start()
+
+    def request(self, signal, sql, params, callback, error_callback):
+        self.last_request_id += 1
+        self.callbacks[self.last_request_id] = callback, error_callback
+        signal.emit(self.last_request_id, sql, params)
+
+    def query(self, sql: str, params=(), callback: Optional[Callable[[list], None]] = None,
+              error_callback: Optional[Callable[[str], None]] = None):
+        self.request(self.worker.query_requested, sql, params, callback, error_callback)
+
+    def execute(self, sql: str, params=(), callback: Optional[Callable[[int], None]] = None,
+                error_callback: Optional[Callable[[str], None]] = None):
+        self.request(self.worker.execute_requested, sql, params, callback, error_callback)
+
+    def execute_many(self, sql: str, params_list: list, callback: Optional[Callable[[int], None]] = None,
+                     error_callback: Optional[Callable[[str], None]] = None):
+        self.request(self.worker.execute_many_requested, sql, params_list, callback, error_callback)
+
+    def request_finished(self, request_id, result):
+        callback, _ = self.callbacks.pop(request_id)
+        if callback is not None:
+            callback(result)
+
+    def request_failed(self, request_id, message):
+        # the caller undoes its own state, the error is shown to the user either way
+        _, error_callback = self.callbacks.pop(request_id)
+        if error_callback is not None:
+            error_callback(message)
+        self.error.emit(message)
+
+    def close(self):
+        if not self.worker_thread.isRunning():
+            return
+        QMetaObject.invokeMethod(self.worker, 'close', Qt.ConnectionType.BlockingQueuedConnection)
+        self.worker_thread.quit()
+        self.worker_thread.wait()
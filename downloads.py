@@ -0,0 +1,368 @@
+import glob
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from PyQt6.QtCore import QObject, pyqtSignal, QThread, pyqtSlot
+
+import engine
+import logs
+from models import DownloadJob, JobState, Video, ProgressUpdate, JobMetrics
+from postprocessing import PostprocessPool
+
+# progress of a job is sent to the GUI at most this many times a second
+PROGRESS_RATE = 10
+
+
+def remove_part_files(part_files: set[str]):
+    for part_file in part_files:
+        path = Path(part_file)
+        path.unlink(missing_ok=True)
+        # state and segments of fragmented and segmented downloads
+        path.with_suffix('.ytdl').unlink(missing_ok=True)
+        for fragment in path.parent.glob(f'{glob.escape(path.name)}-Frag*'):
+            fragment.unlink(missing_ok=True)
+
+
+def video_key(video: Video) -> tuple:
+    if video.extractor and video.video_id:
+        return video.extractor, video.video_id, video.quality
+    return None, video.url, video.quality
+
+
+log = logging.getLogger(__name__)
+
+
+class DownloadWorker(QObject):
+    download_requested = pyqtSignal(int, dict, str, object)
+    progress = pyqtSignal(int, object)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(int, str)
+    stopped = pyqtSignal(int)
+    # metrics of the run, sent right before it is finished, failed or stopped
+    measured = pyqtSignal(int, object)
+
+    def __init__(self, stop_requests: set[int]):
+        super().__init__()
+        self.stop_requests = stop_requests
+        self.last_progress = 0.0
+        self.part_files: set[str] = set()
+        self.run_started = 0.0
+        self.metrics = JobMetrics()
+        self.file_bytes: dict[str, int] = {}
+        self.download_requested.connect(self.download)
+
+    def hook(self, job_id, d):
+        if job_id in self.stop_requests:
+            from yt_dlp.utils import DownloadCancelled
+            raise DownloadCancelled()
+        if d['status'] != 'downloading':
+            info = d.get('info_dict', {})
+            if d['status'] == 'finished' and 'filename' in d and 'postprocessor' not in d:
+                self.file_bytes[d['filename']] = d.get('total_bytes') or d.get('downloaded_bytes') or 0
+            self.progress.emit(job_id, ProgressUpdate(d['status'], path=info.get('filepath') or info.get('filename'),
+                                                      format_id=info.get('format_id')))
+            return
+        now = time.monotonic()
+        self.measure(d, now)
+        # yt-dlp calls the hook for every received block, the GUI only needs a few updates a second
+        part_file = d.get('tmpfilename')
+        new_part_file = part_file is not None and part_file not in self.part_files
+        if now - self.last_progress < 1 / PROGRESS_RATE and not new_part_file:
+            return
+        self.last_progress = now
+        if new_part_file:
+            self.part_files.add(part_file)
+        self.progress.emit(job_id, self.progress_update(d, part_file))
+
+    def measure(self, d, now):
+        # runs for every received block as well, so it only does a few comparisons
+        downloaded = d.get('downloaded_bytes')
+        if downloaded:
+            if self.metrics.ttfb is None:
+                self.metrics.ttfb = now - self.run_started
+                self.metrics.host = urlsplit(d.get('info_dict', {}).get('url') or '').hostname
+            self.file_bytes[d.get('filename')] = downloaded
+        speed = d.get('speed')
+        if speed and speed > (self.metrics.peak_speed or 0):
+            self.metrics.peak_speed = speed
+
+    @staticmethod
+    def progress_update(d, part_file) -> ProgressUpdate:
+        downloaded = d.get('downloaded_bytes') or 0
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        speed = d.get('speed')
+        percent = eta = None
+        if total:
+            percent = min(downloaded / total * 100, 100)
+            eta = (total - downloaded) / speed if speed else None
+        elif d.get('fragment_count'):
+            percent = (d.get('fragment_index') or 0) / d['fragment_count'] * 100
+        return ProgressUpdate('downloading', percent, speed, d.get('eta') if eta is None else eta, part_file)
+
+    @pyqtSlot(int, dict, str, object)
+    def download(self, job_id, options, url, info):
+        from yt_dlp.utils import DownloadCancelled, YoutubeDLError
+        self.last_progress = 0.0
+        self.part_files.clear()
+        self.run_started = time.monotonic()
+        self.metrics = JobMetrics()
+        self.file_bytes = {}
+        logger = engine.RetryCountingLogger()
+        try:
+            engine.download(url, {**options, 'logger': logger}, info, lambda d: self.hook(job_id, d))
+        except DownloadCancelled:
+            self.measured.emit(job_id, self.run_metrics(logger))
+            self.stopped.emit(job_id)
+        except YoutubeDLError as e:
+            self.measured.emit(job_id, self.run_metrics(logger))
+            self.failed.emit(job_id, engine.error_message(e))
+        else:
+            self.measured.emit(job_id, self.run_metrics(logger))
+            self.finished.emit(job_id)
+
+    def run_metrics(self, logger: engine.RetryCountingLogger) -> JobMetrics:
+        self.metrics.bytes = sum(self.file_bytes.values())
+        self.metrics.retries = logger.retries
+        return self.metrics
+
+
+class DownloadQueue(QObject):
+    job_added = pyqtSignal(int)
+    job_changed = pyqtSignal(int)
+    job_progress = pyqtSignal(int, object)
+    job_finished = pyqtSignal(int)
+    job_failed = pyqtSignal(int)
+
+    def __init__(self, workers_count: Optional[int] = None, postprocess: Optional[PostprocessPool] = None):
+        super().__init__()
+        # conversions run in their own processes, so a worker takes the next download meanwhile
+        self.postprocess = postprocess or PostprocessPool()
+        self.postprocess.finished.connect(self.postprocess_finished)
+        self.postprocess.failed.connect(self.postprocess_failed)
+        self.jobs: dict[int, DownloadJob] = {}
+        self.pending: deque[int] = deque()
+        self.stop_requests: set[int] = set()
+        self.threads: dict[DownloadWorker, QThread] = {}
+        self.idle: list[DownloadWorker] = []
+        self.busy: dict[int, DownloadWorker] = {}
+        self.last_job_id = 0
+        self.workers_count = 0
+        self.set_workers_count(workers_count or engine.default_workers_count())
+
+    def set_workers_count(self, count: int):
+        self.workers_count = count
+        while len(self.threads) < count:
+            self.add_worker()
+        # busy workers are retired in release() once their job is over
+        while len(self.threads) > count and self.idle:
+            self.remove_worker(self.idle.pop())
+        self.schedule()
+
+    def add_worker(self):
+        thread = QThread()
+        worker = DownloadWorker(self.stop_requests)
+        worker.progress.connect(self.worker_progress)
+        worker.finished.connect(self.worker_finished)
+        worker.failed.connect(self.worker_failed)
+        worker.stopped.connect(self.worker_stopped)
+        worker.measured.connect(self.worker_measured)
+        worker.moveToThread(thread)
+        thread.start()
+        self.threads[worker] = thread
+        self.idle.append(worker)
+
+    def remove_worker(self, worker: DownloadWorker):
+        thread = self.threads.pop(worker)
+        thread.quit()
+        thread.wait()
+
+    def add(self, video: Video, options: dict, info: Optional[dict] = None, paused: bool = False,
+            record_id: Optional[int] = None) -> int:
+        self.last_job_id += 1
+        job = DownloadJob(self.last_job_id, video, options, info, record_id=record_id)
+        self.jobs[job.id] = job
+        if paused:
+            job.state = JobState.PAUSED
+        else:
+            self.pending.append(job.id)
+        self.job_added.emit(job.id)
+        self.schedule()
+        return job.id
+
+    def find(self, video: Video) -> Optional[DownloadJob]:
+        # videos without an extractor and id (direct files, generic pages) are told apart by their url
+        key = video_key(video)
+        for job in self.jobs.values():
+            if job.state in (JobState.QUEUED, JobState.RUNNING, JobState.PAUSED) and video_key(job.video) == key:
+                return job
+        return None
+
+    def schedule(self):
+        while self.pending and self.idle:
+            job = self.jobs[self.pending.popleft()]
+            worker = self.idle.pop()
+            self.busy[job.id] = worker
+            job.state = JobState.RUNNING
+            job.error = None
+            job.started_at = time.monotonic()
+            if job.metrics.started_at is None:
+                job.metrics.started_at = time.time()
+            log.debug('Job %d started: %s', job.id, job.video.url)
+            self.job_changed.emit(job.id)
+            options = {key: value for key, value in job.options.items() if key != 'postprocessors'}
+            worker.download_requested.emit(job.id, options, job.video.url, job.info)
+
+    def release(self, job_id: int):
+        worker = self.busy.pop(job_id)
+        job = self.jobs[job_id]
+        job.download_time += time.monotonic() - job.started_at
+        self.stop_requests.discard(job_id)
+        if len(self.idle) + len(self.busy) >= self.workers_count:
+            self.remove_worker(worker)
+        else:
+            self.idle.append(worker)
+        self.schedule()
+
+    def pause(self, job_id: int):
+        job = self.jobs[job_id]
+        if job.state == JobState.QUEUED:
+            self.pending.remove(job_id)
+        elif job.state == JobState.RUNNING:
+            # yt-dlp keeps the .part file, so resuming continues from where it stopped
+            self.stop_requests.add(job_id)
+        else:
+            return
+        job.state = JobState.PAUSED
+        job.speed = job.eta = None
+        self.job_changed.emit(job_id)
+
+    def resume(self, job_id: int):
+        job = self.jobs[job_id]
+        if job.state not in (JobState.PAUSED, JobState.FAILED):
+            return
+        if job_id in self.busy:
+            # the worker has not noticed the pause yet
+            self.stop_requests.discard(job_id)
+            job.state = JobState.RUNNING
+        else:
+            job.state = JobState.QUEUED
+            self.pending.append(job_id)
+        self.job_changed.emit(job_id)
+        self.schedule()
+
+    def cancel(self, job_id: int):
+        job = self.jobs[job_id]
+        if job.state in (JobState.DONE, JobState.CANCELLED):
+            return
+        if job.state == JobState.QUEUED:
+            self.pending.remove(job_id)
+        elif job.state == JobState.POSTPROCESSING:
+            self.postprocess.cancel(job_id)
+        if job_id in self.busy:
+            self.stop_requests.add(job_id)
+        else:
+            self.remove_part_files(job)
+        job.state = JobState.CANCELLED
+        job.speed = job.eta = None
+        self.job_changed.emit(job_id)
+
+    def shutdown(self):
+        self.pending.clear()
+        self.stop_requests.update(self.busy)
+        for worker in list(self.threads):
+            self.remove_worker(worker)
+        self.postprocess.shutdown()
+
+    @staticmethod
+    def remove_part_files(job: DownloadJob):
+        remove_part_files(job.part_files)
+        job.part_files.clear()
+
+    def worker_progress(self, job_id, update: ProgressUpdate):
+        job = self.jobs[job_id]
+        if update.status == 'downloading':
+            if update.part_file:
+                job.part_files.add(update.part_file)
+            if update.percent is not None:
+                job.progress = update.percent
+            job.speed = update.speed
+            job.eta = update.eta
+        elif update.status == 'finished':
+            job.video.path = update.path or job.video.path
+            job.video.format_id = update.format_id or job.video.format_id
+        self.job_progress.emit(job_id, update)
+
+    def worker_measured(self, job_id, run: JobMetrics):
+        # a paused and resumed job is downloaded in several runs
+        self.jobs[job_id].metrics.add_run(run)
+
+    def worker_finished(self, job_id):
+        job = self.jobs[job_id]
+        self.release(job_id)
+        job.progress = 100
+        job.speed = job.eta = None
+        job.part_files.clear()
+        logs.timing('download', job.download_time, job=job_id, url=job.video.url, format=job.video.format_id)
+        if job.options.get('postprocessors') and job.video.path:
+            job.state = JobState.POSTPROCESSING
+            job.postprocess_started_at = time.monotonic()
+            self.job_changed.emit(job_id)
+            self.postprocess.submit(job_id, job.video.path, job.options['postprocessors'],
+                                    job.options.get('ffmpeg_location'))
+        else:
+            self.finish(job)
+
+    def finish(self, job: DownloadJob):
+        log.info('Job %d done: %s', job.id, job.video.path)
+        job.state = JobState.DONE
+        self.job_changed.emit(job.id)
+        self.job_finished.emit(job.id)
+
+    def postprocess_finished(self, job_id, path):
+        job = self.jobs[job_id]
+        if job.state == JobState.POSTPROCESSING:
+            # includes the time waiting for a free process of the pool
+            job.metrics.postprocess_time = time.monotonic() - job.postprocess_started_at
+            logs.timing('postprocess', job.metrics.postprocess_time, job=job_id, url=job.video.url)
+            job.video.path = path
+            self.finish(job)
+
+    def postprocess_failed(self, job_id, message):
+        job = self.jobs[job_id]
+        if job.state == JobState.POSTPROCESSING:
+            log.warning('Postprocessing of job %d failed: %s', job_id, message)
+            job.metrics.postprocess_time = time.monotonic() - job.postprocess_started_at
+            job.state = JobState.FAILED
+            job.error = message
+            self.job_changed.emit(job_id)
+            self.job_failed.emit(job_id)
+
+    def worker_failed(self, job_id, message):
+        job = self.jobs[job_id]
+        self.release(job_id)
+        if job.state == JobState.CANCELLED:
+            self.remove_part_files(job)
+        elif job.state != JobState.PAUSED:
+            log.warning('Job %d failed: %s', job_id, message)
+            job.state = JobState.FAILED
+            job.error = message
+        job.speed = job.eta = None
+        self.job_changed.emit(job_id)
+        if job.state == JobState.FAILED:
+            self.job_failed.emit(job_id)
+
+    def worker_stopped(self, job_id):
+        job = self.jobs[job_id]
+        self.release(job_id)
+        if job.state == JobState.CANCELLED:
+            self.remove_part_files(job)
+        elif job.state == JobState.RUNNING:
+            # resumed before the worker got to stop
+            job.state = JobState.QUEUED
+            self.pending.append(job_id)
+            self.schedule()
+        self.job_changed.emit(job_id)
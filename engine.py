@@ -0,0 +1,165 @@
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Callable
+
+from formats import FormatPlan
+
+# yt_dlp and its hundreds of extractors are imported by the functions using them, so the window
+# does not wait for them at startup
+
+# the id keeps parallel downloads of different videos with the same title apart
+OUTPUT_TEMPLATE = '%(title)s - %(height)sp [%(id)s].%(ext)s'
+# threads given to every ffmpeg, more of them scale worse than more ffmpegs running side by side
+FFMPEG_THREADS = 2
+# conversions are background work, they should not make downloads or the GUI stutter
+FFMPEG_NICE = 10
+# how yt-dlp reports a retry of a request or a fragment, e.g. "... Retrying fragment 3 (1/10)..."
+RETRY_MESSAGE = re.compile(r'Retrying(?: fragments?(?: \d+)?)? \(\d+/\S+\)')
+
+# given to every YoutubeDL as its logger, so messages of yt-dlp go to the log instead of the console
+ytdlp_log = logging.getLogger('yt_dlp')
+
+
+class RetryCountingLogger:
+    # passed to yt-dlp as its logger, forwards the messages to the log and counts the retries,
+    # which are only reported as messages
+    def __init__(self):
+        self.retries = 0
+
+    def debug(self, message):
+        if RETRY_MESSAGE.search(message):
+            self.retries += 1
+        ytdlp_log.debug(message)
+
+    def info(self, message):
+        ytdlp_log.info(message)
+
+    def warning(self, message):
+        if RETRY_MESSAGE.search(message):
+            self.retries += 1
+        ytdlp_log.warning(message)
+
+    def error(self, message):
+        ytdlp_log.error(message)
+
+
+def default_workers_count() -> int:
+    # downloads are network-bound, so a worker per core keeps the link busy,
+    # but more than 8 parallel streams only split the same bandwidth
+    return max(2, min(8, os.cpu_count() or 1))
+
+
+def default_postprocess_workers_count(threads: int = FFMPEG_THREADS) -> int:
+    return max(1, (os.cpu_count() or 1) // threads)
+
+
+def default_ffmpeg_location() -> str:
+    return str(Path.cwd() / 'bin')
+
+
+def recognized(url: str) -> bool:
+    # the generic extractor takes any url, so only a site extractor counts;
+    # the first call compiles the patterns of every extractor and takes most of a second
+    from yt_dlp.extractor import gen_extractor_classes
+    return any(ie.suitable(url) for ie in gen_extractor_classes() if ie.ie_key() != 'Generic')
+
+
+def entry_url(entry: dict) -> str:
+    return entry.get('webpage_url') or entry.get('url') or entry['id']
+
+
+def flat_entries(info: dict) -> list[dict]:
+    # channels come as a playlist of tabs, each of them is a playlist of videos
+    entries = []
+    for entry in info.get('entries') or []:
+        if entry is None:
+            continue
+        if entry.get('_type') == 'playlist':
+            entries.extend(flat_entries(entry))
+        else:
+            entries.append(entry)
+    return entries
+
+
+def download_options(save_path: str, plan: FormatPlan, connections: Optional[int] = None,
+                     ffmpeg_location: Optional[str] = None) -> dict:
+    options = {
+        'ffmpeg_location': ffmpeg_location or default_ffmpeg_location(),
+        'outtmpl': str(Path(save_path) / OUTPUT_TEMPLATE),
+        'default_search': 'ytsearch',
+        'noplaylist': True
+    }
+    if connections:
+        from segmented import segmented_options
+        options.update(segmented_options(connections))
+    plan.apply(options)
+    return options
+
+
+def error_message(error: Exception) -> str:
+    # errors of yt-dlp carry their message in msg
+    return getattr(error, 'msg', None) or str(error)
+
+
+def expired_urls(error) -> bool:
+    # format urls of a cached or long queued info expire, sites answer them with 403 or 410
+    from yt_dlp.networking.exceptions import HTTPError
+    cause = error.exc_info[1] if error.exc_info else None
+    return isinstance(cause, HTTPError) and cause.status in (403, 410)
+
+
+def download(url: str, options: dict, info: Optional[dict] = None, hook: Optional[Callable[[dict], None]] = None):
+    options = dict(options)
+    options.setdefault('logger', ytdlp_log)
+    if hook is not None:
+        # the progress is reported by the hook
+        options['noprogress'] = True
+        options['progress_hooks'] = [hook]
+        options['postprocessor_hooks'] = [hook]
+    import yt_dlp
+    from segmented import SegmentedYoutubeDL
+    with SegmentedYoutubeDL(options) as ydl:
+        if info is None:
+            ydl.download([url])
+            return
+        # reuse the already extracted info instead of extracting it again
+        try:
+            ydl.process_ie_result(ydl.sanitize_info(info, True), download=True)
+        except yt_dlp.utils.ReExtractInfo:
+            ydl.download([url])
+        except yt_dlp.utils.DownloadError as e:
+            # only expired format urls are worth a new extraction, other errors would just happen again
+            if not expired_urls(e):
+                raise
+            ydl.download([url])
+
+
+def lower_priority(niceness: int):
+    # ffmpeg started by the pool process inherits its priority
+    if hasattr(os, 'nice'):
+        os.nice(niceness)
+
+
+def postprocess_executor(workers_count: Optional[int] = None, threads: int = FFMPEG_THREADS,
+                         niceness: int = FFMPEG_NICE) -> ProcessPoolExecutor:
+    # spawned rather than forked, a fork of a process running Qt threads is not safe
+    return ProcessPoolExecutor(workers_count or default_postprocess_workers_count(threads),
+                               mp_context=multiprocessing.get_context('spawn'),
+                               initializer=lower_priority, initargs=(niceness,))
+
+
+def run_postprocessors(path: str, postprocessors: list[dict], ffmpeg_location: Optional[str], threads: int) -> str:
+    import yt_dlp
+    params = {
+        'logger': ytdlp_log,
+        'ffmpeg_location': ffmpeg_location,
+        'postprocessors': postprocessors,
+        'postprocessor_args': {'default': ['-threads', str(threads)]},
+    }
+    with yt_dlp.YoutubeDL(params) as ydl:
+        info = ydl.post_process(path, {'filepath': path, 'ext': Path(path).suffix[1:]})
+    return info['filepath']
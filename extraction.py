@@ -0,0 +1,223 @@
+import logging
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+
+from cache import InfoCache
+from engine import recognized, error_message, ytdlp_log
+import logs
+
+log = logging.getLogger(__name__)
+
+EXTRACT_WORKERS_COUNT = 3
+PREFETCH_DELAY = 400
+PREFETCH_CACHE_SIZE = 8
+PREFETCH_KEY = 'prefetch'
+URL_PATTERN = re.compile(r'https?://\S+')
+
+
+class InfoExtractor(QObject):
+    # key, url, info; only the latest lookup made with a key is delivered
+    finished = pyqtSignal(str, str, object)
+    failed = pyqtSignal(str, str, str)
+    # key, url of a lookup made with recognized_only for a url no site extractor takes
+    unsupported = pyqtSignal(str, str)
+    preloaded = pyqtSignal()
+    # emitted from the pool threads, relayed in the thread of the extractor
+    extracted = pyqtSignal(int, str, str, object)
+    extraction_failed = pyqtSignal(int, str, str, str)
+    rejected = pyqtSignal(int, str, str)
+
+    def __init__(self, cache: InfoCache, workers_count: int = EXTRACT_WORKERS_COUNT):
+        super().__init__()
+        self.cache = cache
+        # separate from the download workers, so a lookup never waits for a download
+        self.executor = ThreadPoolExecutor(workers_count, thread_name_prefix='extraction')
+        self.last_request_id = 0
+        # key (the field the url came from) -> the latest request id and its future
+        self.latest: dict[str, int] = {}
+        self.futures: dict[str, Future] = {}
+        self.extracted.connect(self.extraction_finished)
+        self.extraction_failed.connect(self.extraction_error)
+        self.rejected.connect(self.extraction_rejected)
+
+    def preload(self):
+        self.executor.submit(self.import_extractors)
+
+    def import_extractors(self):
+        # yt_dlp with its extractors is imported here once the window is shown, not on the first lookup
+        from yt_dlp.extractor import gen_extractor_classes
+        gen_extractor_classes()
+        self.preloaded.emit()
+
+    def lookup(self, key: str, url: str, refresh: bool = False, recognized_only: bool = False) -> int:
+        self.cancel(key)
+        self.last_request_id += 1
+        self.latest[key] = self.last_request_id
+        self.futures[key] = self.executor.submit(self.extract, self.last_request_id, key, url, refresh,
+                                                 recognized_only)
+        return self.last_request_id
+
+    def cancel(self, key: str):
+        # a lookup still waiting for a thread is dropped, a running one finishes but is not delivered
+        self.latest.pop(key, None)
+        future = self.futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def is_latest(self, request_id: int, key: str) -> bool:
+        return self.latest.get(key) == request_id
+
+    def extract(self, request_id, key, url, refresh, recognized_only):
+        if not self.is_latest(request_id, key):
+            return
+        if recognized_only and not recognized(url):
+            self.rejected.emit(request_id, key, url)
+            return
+        import yt_dlp
+        started = time.monotonic()
+        # playlist entries are only listed here and get resolved in parallel later
+        try:
+            with yt_dlp.YoutubeDL({'extract_flat': 'in_playlist', 'logger': ytdlp_log}) as ydl:
+                info = self.cache.extract_info(ydl, url, refresh)
+        except Exception as e:
+            # anything else, e.g. a locked cache database, would be swallowed by the future
+            # and the lookup would never end
+            if not isinstance(e, yt_dlp.utils.YoutubeDLError):
+                log.exception('Lookup of %s failed', url)
+            logs.timing('extraction', time.monotonic() - started, url=url, refresh=refresh, failed=True)
+            self.extraction_failed.emit(request_id, key, url, error_message(e))
+        else:
+            logs.timing('extraction', time.monotonic() - started, url=url, refresh=refresh)
+            self.extracted.emit(request_id, key, url, info)
+
+    def extraction_finished(self, request_id, key, url, info):
+        if self.is_latest(request_id, key):
+            self.futures.pop(key, None)
+            del self.latest[key]
+            self.finished.emit(key, url, info)
+        else:
+            log.debug('Lookup %d of %s superseded', request_id, url)
+
+    def extraction_rejected(self, request_id, key, url):
+        if self.is_latest(request_id, key):
+            self.futures.pop(key, None)
+            del self.latest[key]
+            self.unsupported.emit(key, url)
+
+    def extraction_error(self, request_id, key, url, message):
+        if self.is_latest(request_id, key):
+            self.futures.pop(key, None)
+            del self.latest[key]
+            log.warning('Lookup of %s failed: %s', url, message)
+            self.failed.emit(key, url, message)
+
+    def shutdown(self):
+        self.latest.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Prefetcher(QObject):
+    # url, info of a prefetched lookup
+    prefetched = pyqtSignal(str, object)
+    # url and the error; the message is empty for a link no site extractor takes, it was not looked up
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, extractor: InfoExtractor, delay: int = PREFETCH_DELAY,
+                 cache_size: int = PREFETCH_CACHE_SIZE):
+        super().__init__()
+        self.extractor = extractor
+        self.extractor.finished.connect(self.lookup_finished)
+        self.extractor.failed.connect(self.lookup_failed)
+        self.extractor.unsupported.connect(self.lookup_failed)
+        self.enabled = False
+        self.cache_size = cache_size
+        # infos kept in memory, so they are shown without reading the disk cache
+        self.infos: OrderedDict[str, dict] = OrderedDict()
+        self.pending_url: Optional[str] = None
+        # a pending url the window waits for, it is not superseded by the next prefetch
+        self.awaited: Optional[str] = None
+        self.candidate: Optional[tuple[str, bool]] = None
+        # waits for the text to stop changing, a url typed by hand is not looked up at every key press
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.start)
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        if not enabled:
+            self.timer.stop()
+            self.candidate = None
+            if self.awaited is None:
+                self.pending_url = None
+                self.extractor.cancel(PREFETCH_KEY)
+
+    def watch(self, text: str, recognized_only: bool = False):
+        # the url field takes any link, text from the clipboard only links of the sites yt-dlp knows
+        text = text.strip()
+        if not self.enabled or not URL_PATTERN.fullmatch(text):
+            return
+        if text in self.infos or text == self.pending_url:
+            return
+        self.candidate = text, recognized_only
+        self.timer.start()
+
+    def start(self):
+        if self.candidate is None:
+            return
+        if self.awaited is not None:
+            # started once the awaited lookup is over
+            return
+        url, recognized_only = self.candidate
+        self.candidate = None
+        self.pending_url = url
+        self.extractor.lookup(PREFETCH_KEY, url, recognized_only=recognized_only)
+
+    def skip(self, url: str):
+        # looked up by the caller itself, a prefetch waiting for the delay would do it twice
+        if self.candidate is not None and self.candidate[0] == url:
+            self.timer.stop()
+            self.candidate = None
+
+    def wait_for(self, url: str) -> bool:
+        if url != self.pending_url:
+            return False
+        self.awaited = url
+        return True
+
+    def stop_waiting(self):
+        self.awaited = None
+
+    def get(self, url: str) -> Optional[dict]:
+        info = self.infos.get(url)
+        if info is not None:
+            self.infos.move_to_end(url)
+        return info
+
+    def lookup_finished(self, key, url, info):
+        if key != PREFETCH_KEY:
+            return
+        self.pending_url = None
+        log.debug('Prefetched %s', url)
+        self.infos[url] = info
+        if len(self.infos) > self.cache_size:
+            self.infos.popitem(last=False)
+        self.prefetched.emit(url, info)
+        self.lookup_over()
+
+    def lookup_failed(self, key, url, message=''):
+        if key == PREFETCH_KEY:
+            self.pending_url = None
+            self.failed.emit(url, message)
+            self.lookup_over()
+
+    def lookup_over(self):
+        self.awaited = None
+        # a candidate held back while the window waited
+        if self.enabled and self.candidate is not None and not self.timer.isActive():
+            self.start()
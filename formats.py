@@ -0,0 +1,165 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+VIDEO, AUDIO, VIDEO_ONLY = range(3)
+
+# codecs a container takes as they are, so ffmpeg only has to copy the streams
+VIDEO_CODECS = {
+    'mp4': ('avc1', 'h264', 'hev1', 'hvc1', 'h265', 'av01'),
+    'webm': ('vp8', 'vp9', 'vp09', 'av01'),
+}
+AUDIO_CODECS = {
+    'mp4': ('mp4a', 'aac', 'mp3'),
+    'webm': ('opus', 'vorbis'),
+    'mp3': ('mp3',),
+    'flac': ('flac',),
+    'opus': ('opus',),
+    'wav': (),
+}
+# audio targets produced by extracting the audio track, the rest are converted as media files
+EXTRACT_AUDIO_CODECS = ('mp3', 'flac', 'opus', 'wav')
+
+# rough encoding speed in seconds of media per second of work, video ones are for 1080p on a desktop cpu
+VIDEO_ENCODE_SPEED = {'mp4': 1.5, 'webm': 0.4}
+DEFAULT_VIDEO_ENCODE_SPEED = 1
+AUDIO_ENCODE_SPEED = 50
+FULL_HD_PIXELS = 1920 * 1080
+
+
+@dataclass
+class FormatPlan:
+    format: str
+    postprocessors: list[dict] = field(default_factory=list)
+    merge_output_format: Optional[str] = None
+    transcode: bool = False
+    # estimated seconds of ffmpeg work, None if nothing is transcoded or the duration is unknown
+    cost: Optional[float] = None
+
+    def apply(self, options: dict):
+        options['format'] = self.format
+        if self.merge_output_format:
+            options['merge_output_format'] = self.merge_output_format
+        if self.postprocessors:
+            options['postprocessors'] = self.postprocessors
+
+
+def codec_name(codec: Optional[str]) -> Optional[str]:
+    if not codec or codec == 'none':
+        return None
+    return codec.split('.')[0].lower()
+
+
+def codec_fits(codec: Optional[str], codecs: tuple[str, ...]) -> bool:
+    return codec_name(codec) in codecs
+
+
+def codec_filter(field_name: str, codecs: tuple[str, ...]) -> str:
+    return f"[{field_name}~='^({'|'.join(codecs)})']"
+
+
+def height_fits(fmt: dict, height: Optional[int], height_op: str) -> bool:
+    if height is None:
+        return True
+    if not fmt.get('height'):
+        return False
+    return fmt['height'] == height if height_op == '=' else fmt['height'] <= height
+
+
+def remuxer(container: str) -> dict:
+    return {'key': 'FFmpegVideoRemuxer', 'preferedformat': container}
+
+
+def convertor(container: str) -> dict:
+    # does nothing when the downloaded file is already in the container
+    return {'key': 'FFmpegVideoConvertor', 'preferedformat': container}
+
+
+def video_cost(container: str, height: Optional[int], duration: Optional[float]) -> Optional[float]:
+    if not duration:
+        return None
+    pixels = (height or 1080) ** 2 * 16 / 9
+    return duration * pixels / FULL_HD_PIXELS / VIDEO_ENCODE_SPEED.get(container, DEFAULT_VIDEO_ENCODE_SPEED)
+
+
+def audio_cost(duration: Optional[float]) -> Optional[float]:
+    return duration / AUDIO_ENCODE_SPEED if duration else None
+
+
+def plan_audio(container: str, base: str, audio_formats: Optional[list[dict]],
+               duration: Optional[float]) -> FormatPlan:
+    codecs = AUDIO_CODECS.get(container, ())
+    plan = FormatPlan(f'bestaudio{codec_filter("acodec", codecs)}/{base}' if codecs else base)
+    fits = audio_formats is not None and any(codec_fits(fmt.get('acodec'), codecs) for fmt in audio_formats)
+    if container in EXTRACT_AUDIO_CODECS:
+        # the track is copied when it already has the codec, and encoded otherwise
+        plan.postprocessors = [{'key': 'FFmpegExtractAudio', 'preferredcodec': container}]
+    else:
+        plan.postprocessors = [remuxer(container) if fits else convertor(container)]
+    plan.transcode = audio_formats is not None and not fits
+    plan.cost = audio_cost(duration) if plan.transcode else None
+    return plan
+
+
+def plan_formats(sound: int, container: Optional[str], height: Optional[int] = None, height_op: str = '=',
+                 formats: Optional[list[dict]] = None, duration: Optional[float] = None) -> FormatPlan:
+    # formats are None for playlist entries, which are not resolved yet when the download is planned
+    height_filter = f'[height{height_op}{height}]' if height is not None else ''
+    if sound == AUDIO:
+        base = 'bestaudio/best'
+    elif sound == VIDEO_ONLY:
+        base = f'bestvideo{height_filter}/best'
+    else:
+        base = f'bestvideo{height_filter}+bestaudio/best'
+    if not container:
+        return FormatPlan(base)
+
+    if sound == AUDIO:
+        audio_formats = None if formats is None else [
+            fmt for fmt in formats if codec_name(fmt.get('acodec')) and not codec_name(fmt.get('vcodec'))]
+        return plan_audio(container, base, audio_formats, duration)
+
+    video_codecs = VIDEO_CODECS.get(container)
+    audio_codecs = AUDIO_CODECS.get(container)
+    if video_codecs is None:
+        return FormatPlan(base, [convertor(container)], None, formats is not None,
+                          video_cost(container, height, duration) if formats is not None else None)
+    preferred = f'bestvideo{height_filter}{codec_filter("vcodec", video_codecs)}'
+    if sound == VIDEO:
+        preferred += f'+bestaudio{codec_filter("acodec", audio_codecs)}'
+    plan = FormatPlan(f'{preferred}/{base}', merge_output_format=container)
+    if formats is None:
+        plan.postprocessors = [convertor(container)]
+        return plan
+
+    videos = [fmt for fmt in formats if codec_name(fmt.get('vcodec')) and height_fits(fmt, height, height_op)]
+    video_fits = any(codec_fits(fmt.get('vcodec'), video_codecs) for fmt in videos)
+    audio_fits = sound == VIDEO_ONLY or any(codec_fits(fmt.get('acodec'), audio_codecs) for fmt in formats)
+    if video_fits and audio_fits:
+        plan.postprocessors = [remuxer(container)]
+        return plan
+    # merged into its natural container first, otherwise the convertor would take the file as already converted
+    plan.merge_output_format = None
+    plan.postprocessors = [convertor(container)]
+    plan.transcode = True
+    plan.cost = video_cost(container, max((fmt['height'] for fmt in videos), default=height), duration)
+    return plan
+
+
+def plan_format(fmt: dict, container: Optional[str], duration: Optional[float] = None) -> FormatPlan:
+    # a format picked by hand is kept, only the way to get it into the container is chosen
+    plan = FormatPlan(fmt['format_id'])
+    if not container:
+        return plan
+    if not codec_name(fmt.get('vcodec')):
+        plan = plan_audio(container, fmt['format_id'], [fmt], duration)
+        plan.format = fmt['format_id']
+        return plan
+    video_fits = codec_fits(fmt.get('vcodec'), VIDEO_CODECS.get(container, ()))
+    audio_fits = not codec_name(fmt.get('acodec')) or codec_fits(fmt.get('acodec'), AUDIO_CODECS.get(container, ()))
+    if video_fits and audio_fits:
+        plan.postprocessors = [remuxer(container)]
+    else:
+        plan.postprocessors = [convertor(container)]
+        plan.transcode = True
+        plan.cost = video_cost(container, fmt.get('height'), duration)
+    return plan
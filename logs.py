@@ -0,0 +1,60 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from pathlib import Path
+from typing import Optional
+
+LOG_DIR = Path('data') / 'logs'
+LOG_FILE = 'pyqyt.log'
+TIMING_LOG_FILE = 'timing.log'
+MAX_LOG_SIZE = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+# DEBUG, INFO, WARNING or ERROR, INFO when not set
+LEVEL_VARIABLE = 'PYQYT_LOG_LEVEL'
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(threadName)s %(name)s: %(message)s'
+
+# durations of the stages of every lookup and download, one JSON object per line in timing.log
+timing_log = logging.getLogger('timing')
+
+
+class TimingFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps({
+            'time': round(record.created, 3),
+            'stage': record.stage,
+            'seconds': round(record.seconds, 3),
+            **record.fields,
+        }, ensure_ascii=False)
+
+
+def timing(stage: str, seconds: float, **fields):
+    # fields tell what was timed: the job id, url and the like
+    timing_log.info('%s %.3f s', stage, seconds, extra={'stage': stage, 'seconds': seconds, 'fields': fields})
+
+
+def setup(directory: Path = LOG_DIR, level: Optional[str] = None) -> logging.handlers.QueueListener:
+    # the logging thread only puts records into the queue, formatting them and writing the files
+    # happen in the listener thread, so logging from the GUI thread does not wait for the disk
+    level = (level or os.environ.get(LEVEL_VARIABLE) or 'INFO').upper()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    log_handler = logging.handlers.RotatingFileHandler(directory / LOG_FILE, maxBytes=MAX_LOG_SIZE,
+                                                       backupCount=LOG_BACKUPS, encoding='utf-8', delay=True)
+    log_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_handler.addFilter(lambda record: record.name != timing_log.name)
+    timing_handler = logging.handlers.RotatingFileHandler(directory / TIMING_LOG_FILE, maxBytes=MAX_LOG_SIZE,
+                                                          backupCount=LOG_BACKUPS, encoding='utf-8', delay=True)
+    timing_handler.setFormatter(TimingFormatter())
+    timing_handler.addFilter(lambda record: record.name == timing_log.name)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    # timings are recorded whatever the level is
+    timing_log.setLevel(logging.INFO)
+    listener = logging.handlers.QueueListener(records, log_handler, timing_handler)
+    listener.start()
+    return listener
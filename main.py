@@ -1,77 +1,84 @@
+# imported before anything else, the startup is timed from here
+import startup
+
+import dataclasses
+import logging
 import subprocess
 import sys
-from dataclasses import dataclass
-from http.client import IncompleteRead
-from typing import Optional, Any
-from urllib.request import urlopen
-from pprint import pprint
-
-import yt_dlp
-from PyQt6.QtCore import QObject, pyqtSignal, QThread, pyqtSlot
-from PyQt6.QtGui import QPixmap
-from PyQt6.QtWidgets import QApplication, QMainWindow, QTableWidgetItem, QListWidgetItem, QFileDialog, \
-    QMessageBox
-
+import time
+from typing import Optional
+
+from PyQt6.QtCore import QUrl, Qt, QTimer, QDate, QDateTime, QTime
+from PyQt6.QtGui import QDesktopServices
+from PyQt6.QtWidgets import QApplication, QMainWindow, QTableWidgetItem, QFileDialog, QMessageBox, QHeaderView, \
+    QMenu, QInputDialog
+
+from cache import InfoCache
+from database import Database, completed_download_query, job_params, new_job_params, job_from_record, \
+    metrics_insert, metrics_summary_query, metrics_intervals_query, slow_extractors_query
+from downloads import DownloadQueue, remove_part_files
+from extraction import InfoExtractor, Prefetcher
+from engine import default_workers_count, download_options, entry_url, flat_entries
+from formats import FormatPlan, plan_formats, plan_format
+import logs
+from metrics import STATS_PERIODS, SLOW_EXTRACTORS, utilization
+from models import Video, JobState, HistoryEntry, HistoryFilter
+from playlists import PlaylistResolver
+from thumbnails import ThumbnailLoader, ThumbnailStore
 from ui.app import Ui_MainWindow
-from ui.historyitem import Ui_HistoryItem
+from ui.formatmodel import FormatModel, FormatFilterModel, FORMAT_ROLE, fit_columns
+from ui.historymodel import HistoryModel, HistoryDelegate
+from ui.playlistdialog import Ui_PlaylistDialog
 from pathlib import Path
 
-import sqlite3
-
-info_columns = [
-    'format_id', 'ext', 'resolution', 'fps', 'filesize', 'filesize_approx', 'tbr',
-    'vcodec', 'vbr', 'audio_channels', 'acodec', 'abr', 'asr',
-    'format', 'format_note', 'dynamic_range', 'url'
-]
-
-
-@dataclass
-class Video:
-    name: str
-    channel: str
-    duration: str
-    url: str
-    quality: Optional[str] = None
-    thumbnail: Optional[Any] = None
-    path: Optional[str] = None
-
-
-class DownloadWorker(QObject):
-    progress = pyqtSignal(dict)
-    load_info_finished = pyqtSignal(dict)
-    download_finished = pyqtSignal()
-
-    @pyqtSlot(str)
-    def load_info(self, url):
-        with yt_dlp.YoutubeDL() as ydl:
-            try:
-                info = ydl.extract_info(url, download=False)
-            except yt_dlp.utils.DownloadError as e:
-                QMessageBox.critical(ex.previewPic, "Ошибка", e.msg)
-        self.load_info_finished.emit(info)
-
-    @pyqtSlot(dict, str)
-    def download(self, options, url):
-        options['progress_hooks'] = [lambda d: self.progress.emit(d)]
-        options['postprocessor_hooks'] = [lambda d: self.progress.emit(d)]
-        with yt_dlp.YoutubeDL(options) as ydl:
-            ydl.download([url])
-        self.download_finished.emit()
+startup.mark('imports')
+
+log = logging.getLogger(__name__)
+
+playlist_qualities = ['144p', '240p', '360p', '480p', '720p', '1080p', '1440p', '2160p']
+
+# stages reached in the background after the first paint, the startup report is printed once all of them are
+STARTUP_STAGES = ('first_paint', 'database', 'history', 'yt_dlp')
+
+
+def video_from_info(info: dict, url: str, quality: str) -> Video:
+    return Video(info['title'], info.get('uploader') or '', info.get('duration_string') or '', url, quality,
+                 thumbnail_url=info.get('thumbnail'), duration_seconds=info.get('duration'),
+                 extractor=info.get('extractor_key'), video_id=info.get('id'))
+
+
+def format_cost(seconds: float) -> str:
+    if seconds < 60:
+        return 'меньше минуты'
+    return f'{round(seconds / 60)} мин.'
 
 
 def open_downloaded_video(path: str):
     subprocess.run(['open', path], check=True)
 
 
+def format_speed(speed):
+    if speed is None:
+        return '0 МБ/с'
+    return f'{speed / 1024 / 1024:.2f} МБ/с'
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return '—'
+    return f'{seconds:.2f} сек.'
+
+
 class MainWidget(QMainWindow, Ui_MainWindow):
     current_video: Video
+    current_info: Optional[dict]
     current_formats: list[dict]
-    download_requested = pyqtSignal(dict, str)
-    load_info_requested = pyqtSignal(str)
+    current_entries: Optional[list[dict]] = None
 
     def __init__(self):
         super().__init__()
         self.setupUi(self)
+        self.painted = False
 
         self.continueBtn.clicked.connect(self.parse_video_info)
         self.saveBtn.clicked.connect(self.download_video)
@@ -79,87 +86,236 @@ class MainWidget(QMainWindow, Ui_MainWindow):
         self.savePath.setText(str(Path.home() / "Downloads"))
         self.urlInput.setFocus()
         self.soundBox.currentIndexChanged.connect(self.sound_formats_changed)
-
-        Path.mkdir(Path.cwd() / 'data' / 'previews', parents=True, exist_ok=True)
-        self.conn = sqlite3.connect("data/main.db")
-        cur = self.conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS `history` (
-            `id` INTEGER PRIMARY KEY AUTOINCREMENT,
-            `name` TEXT NOT NULL,
-            `channel` TEXT NOT NULL,
-            `duration` TEXT NOT NULL,
-            `url` TEXT NOT NULL,
-            `path` TEXT NOT NULL,
-            `quality` TEXT NOT NULL
-            )""")
-        self.conn.commit()
-
-        self.load_history()
-
-        self.worker_thread = QThread()
-        self.worker = DownloadWorker()
-        self.worker.progress.connect(self.download_progress)
-        self.worker.load_info_finished.connect(self.parse_video_info_finished)
-        self.worker.download_finished.connect(self.download_finished)
-        self.worker.moveToThread(self.worker_thread)
-        self.download_requested.connect(self.worker.download)
-        self.load_info_requested.connect(self.worker.load_info)
-        self.worker_thread.start()
+        self.turboBox.toggled.connect(self.connectionsBox.setEnabled)
+        self.current_info = None
+        self.current_formats = []
+        self.format_model = FormatModel()
+        self.format_filter = FormatFilterModel()
+        self.format_filter.setSourceModel(self.format_model)
+        self.qualityTable.setModel(self.format_filter)
+        self.qualityTable.setSortingEnabled(True)
+        self.qualityTable.sortByColumn(-1, Qt.SortOrder.AscendingOrder)
+        self.formatKindFilter.currentIndexChanged.connect(self.format_filter.set_kind)
+        self.codecFilter.currentIndexChanged.connect(
+            lambda: self.format_filter.set_codec(self.codecFilter.currentData()))
+        for signal in (self.formatBox.currentTextChanged, self.soundBox.currentIndexChanged,
+                       self.qualityBox.currentIndexChanged, self.tabWidget.currentChanged,
+                       self.qualityTable.selectionModel().selectionChanged,
+                       self.formatKindFilter.currentIndexChanged, self.codecFilter.currentIndexChanged):
+            signal.connect(self.update_format_plan)
+
+        # opened after the first paint, queries made until then wait in its queue
+        self.db = Database("data/main.db", start=False)
+        self.db.error.connect(self.database_error)
+        self.db.opened.connect(lambda: self.startup_stage('database'))
+
+        self.history_model = HistoryModel(self.db, self.devicePixelRatioF() > 1)
+        self.history_model.page_fetched.connect(lambda: self.startup_stage('history'))
+        self.history_delegate = HistoryDelegate(self.historyList)
+        self.history_delegate.link_clicked.connect(lambda url: QDesktopServices.openUrl(QUrl(url)))
+        self.history_delegate.entry_clicked.connect(lambda entry: open_downloaded_video(entry.path))
+        self.historyList.setItemDelegate(self.history_delegate)
+        self.historyList.setModel(self.history_model)
+        self.historyList.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.historyList.customContextMenuRequested.connect(self.history_context_menu)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.apply_history_filter)
+        self.historySearch.textChanged.connect(self.search_timer.start)
+        self.channelFilter.currentTextChanged.connect(self.search_timer.start)
+        self.qualityFilter.currentIndexChanged.connect(self.search_timer.start)
+        self.dateFilterBox.toggled.connect(self.dateFrom.setEnabled)
+        self.dateFilterBox.toggled.connect(self.dateTo.setEnabled)
+        self.dateFilterBox.toggled.connect(self.search_timer.start)
+        self.dateFrom.dateChanged.connect(self.search_timer.start)
+        self.dateTo.dateChanged.connect(self.search_timer.start)
+        self.dateFrom.setDate(QDate.currentDate().addMonths(-1))
+        self.dateTo.setDate(QDate.currentDate())
+        self.load_history_filters()
+
+        self.info_cache = InfoCache("data/cache.db")
+        self.thumbnails = ThumbnailLoader(ThumbnailStore(Path.cwd() / 'data' / 'thumbnails', "data/cache.db"))
+        self.thumbnails.loaded.connect(self.thumbnail_loaded)
+        self.current_thumbnail: Optional[str] = None
+        self.extractor = InfoExtractor(self.info_cache)
+        self.extractor.finished.connect(self.parse_video_info_finished)
+        self.extractor.failed.connect(self.parse_video_info_failed)
+        self.extractor.preloaded.connect(lambda: self.startup_stage('yt_dlp'))
+        self.prefetcher = Prefetcher(self.extractor)
+        self.prefetcher.prefetched.connect(self.video_info_prefetched)
+        self.prefetcher.failed.connect(self.video_info_prefetch_failed)
+        self.prefetchBox.toggled.connect(self.prefetch_toggled)
+        self.urlInput.textChanged.connect(self.prefetcher.watch)
+        QApplication.clipboard().dataChanged.connect(
+            lambda: self.prefetcher.watch(QApplication.clipboard().text(), recognized_only=True))
+
+        self.queue = DownloadQueue(default_workers_count())
+        self.queue.job_added.connect(self.job_added)
+        self.queue.job_changed.connect(self.job_changed)
+        self.queue.job_progress.connect(self.download_progress)
+        self.queue.job_finished.connect(self.download_finished)
+        self.queue.job_failed.connect(lambda job_id: self.save_metrics(self.queue.jobs[job_id], None))
+        self.queue.job_changed.connect(self.save_job)
+        self.queue_rows: list[int] = []
+        self.queueTable.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.pauseBtn.clicked.connect(lambda: self.selected_jobs_action(self.queue.pause))
+        self.resumeBtn.clicked.connect(lambda: self.selected_jobs_action(self.queue.resume))
+        self.cancelBtn.clicked.connect(lambda: self.selected_jobs_action(self.queue.cancel))
+        self.workersBox.setValue(self.queue.workers_count)
+        self.workersBox.valueChanged.connect(self.queue.set_workers_count)
+        # progress of running jobs is saved now and then, state changes are saved right away
+        self.checkpoint_timer = QTimer(self)
+        self.checkpoint_timer.setInterval(5000)
+        self.checkpoint_timer.timeout.connect(self.checkpoint_jobs)
+        self.checkpoint_timer.start()
+        self.db.query("SELECT id, video, options, state, progress, part_files FROM download_jobs ORDER BY id",
+                      callback=self.offer_resume)
+
+        self.statsPeriod.currentIndexChanged.connect(self.refresh_stats)
+        self.statsRefreshBtn.clicked.connect(self.refresh_stats)
+        self.sideTabs.currentChanged.connect(self.refresh_stats)
+        self.slowExtractorsTable.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+
+        self.resolver = PlaylistResolver(self.info_cache)
+        self.resolver.entry_resolved.connect(self.playlist_entry_resolved)
+        self.resolver.entry_failed.connect(self.playlist_entry_failed)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            self.startup_stage('first_paint')
+            QTimer.singleShot(0, self.start_background)
+
+    def start_background(self):
+        # whatever the window does not need to be drawn is started once it is on screen
+        self.db.start()
+        self.history_model.import_previews(Path.cwd() / 'data' / 'previews')
+        self.thumbnails.prune()
+        self.extractor.preload()
+
+    def startup_stage(self, name):
+        if not startup.mark(name) or name not in STARTUP_STAGES or not startup.completed(STARTUP_STAGES):
+            return
+        for stage, ms in startup.marks.items():
+            logs.timing('startup', ms / 1000, step=stage)
+        if startup.report_mode():
+            startup.print_report()
+            if startup.report_mode() == 'quit':
+                self.close()
+
+    def database_error(self, message):
+        log.error('Database error: %s', message)
+        self.statusbar.showMessage(f'Ошибка базы данных: {message}', 0)
 
     def select_download_folder(self):
         self.savePath.setText(QFileDialog.getExistingDirectory(
             self, "Выберите папку для сохранения", self.savePath.text()) or self.savePath.text())
 
-    def load_history(self):
-        cur = self.conn.cursor()
-        cur.execute("SELECT id, name, channel, duration, url, path, quality FROM history ORDER BY id DESC")
-        history = cur.fetchall()
-
-        self.historyList.clear()
-        for v_id, name, channel, duration, url, path, quality in history:
-            item = QListWidgetItem(self.historyList)
-            item.setToolTip(path)
-            self.historyList.addItem(item)
-
-            row = Ui_HistoryItem(name, channel, str(Path.cwd() / 'data' / 'previews' / f'{v_id}.webp'),
-                                 duration, url, quality)
-            item.setSizeHint(row.minimumSizeHint())
-
-            self.historyList.setItemWidget(item, row)
-            self.historyList.itemClicked.connect(lambda x: open_downloaded_video(x.toolTip()))
+    def load_history_filters(self):
+        self.channelFilter.addItem('Все каналы', '')
+        self.qualityFilter.addItem('Любое качество', '')
+        self.db.query("SELECT DISTINCT channel FROM history WHERE channel != '' ORDER BY channel",
+                      callback=lambda rows: self.add_filter_values(self.channelFilter, rows))
+        self.db.query("SELECT DISTINCT quality FROM history WHERE quality != '' ORDER BY quality",
+                      callback=lambda rows: self.add_filter_values(self.qualityFilter, rows))
+
+    @staticmethod
+    def add_filter_values(box, rows):
+        box.blockSignals(True)
+        for value, in rows:
+            box.addItem(value, value)
+        box.blockSignals(False)
+
+    def add_history_filter_values(self, video):
+        if video.channel and self.channelFilter.findData(video.channel) == -1:
+            self.channelFilter.addItem(video.channel, video.channel)
+        if video.quality and self.qualityFilter.findData(video.quality) == -1:
+            self.qualityFilter.addItem(video.quality, video.quality)
+
+    def apply_history_filter(self):
+        channel = self.channelFilter.currentText()
+        if channel == self.channelFilter.itemText(0):
+            channel = ''
+        history_filter = HistoryFilter(self.historySearch.text(), channel, self.qualityFilter.currentData() or '')
+        if self.dateFilterBox.isChecked():
+            history_filter.date_from = QDateTime(self.dateFrom.date(), QTime(0, 0)).toSecsSinceEpoch()
+            history_filter.date_to = QDateTime(self.dateTo.date().addDays(1), QTime(0, 0)).toSecsSinceEpoch()
+        self.history_model.set_filter(history_filter)
 
     def parse_video_info(self):
-        self.continueBtn.setDisabled(True)
+        # a lookup still running for the url entered before is superseded by this one
+        url = self.urlInput.text()
+        refresh = self.refreshBox.isChecked()
+        self.prefetcher.stop_waiting()
         self.downloadProgress.setValue(10)
+        if not refresh:
+            info = self.prefetcher.get(url)
+            if info is not None:
+                self.extractor.cancel('url')
+                self.parse_video_info_finished('url', url, info)
+                return
+            if self.prefetcher.wait_for(url):
+                # already being looked up, shown as soon as it comes
+                self.extractor.cancel('url')
+                return
+        self.prefetcher.skip(url)
+        self.extractor.lookup('url', url, refresh)
+
+    def prefetch_toggled(self, enabled):
+        self.prefetcher.set_enabled(enabled)
+        if enabled:
+            self.prefetcher.watch(self.urlInput.text())
+
+    def video_info_prefetched(self, url, info):
+        if info.get('thumbnail'):
+            self.thumbnails.load(info['thumbnail'])
+        if url == self.prefetcher.awaited:
+            self.parse_video_info_finished('url', url, info)
+
+    def video_info_prefetch_failed(self, url, message):
+        if url != self.prefetcher.awaited:
+            return
+        if message:
+            self.show_lookup_error(message)
+        else:
+            # skipped by the prefetch, the generic extractor may still take it
+            self.extractor.lookup('url', url)
 
-        self.load_info_requested.emit(self.urlInput.text())
-
-    def parse_video_info_finished(self, info):
-        if '_type' in info and info['_type'] == 'playlist':
-            info = info['entries'][0]
-        url = self.urlInput.text()
-        pprint(info)
+    def parse_video_info_failed(self, key, url, message):
+        # prefetches come through the prefetcher, only lookups of the url field are shown here
+        if key == 'url':
+            self.show_lookup_error(message)
 
-        self.current_video = Video(info['title'], info.get('uploader'),
-                                   info.get('duration_string'), url, f"{info.get('height', 0)}p")
+    def show_lookup_error(self, message):
+        self.downloadProgress.setValue(0)
+        QMessageBox.critical(self, "Ошибка", message)
 
+    def parse_video_info_finished(self, key, url, info):
+        if key != 'url':
+            return
         self.savePath.setEnabled(True)
         self.saveBtn.setEnabled(True)
         self.folderSelectBtn.setEnabled(True)
 
+        if info.get('_type') == 'playlist':
+            self.parse_playlist_info(info, url)
+            return
+        log.info('Loaded %s: %s, %d formats', url, info.get('title'), len(info.get('formats') or []))
+        # the whole info with every format url is large, it is only formatted when debug logging is on
+        log.debug('Info of %s: %s', url, info)
+
+        self.current_entries = None
+        self.current_info = info
+        self.current_video = video_from_info(info, url, f"{info.get('height', 0)}p")
+
         # parse main info
-        preview_pixmap = QPixmap()
-        with urlopen(info['thumbnail']) as picUrl:
-            for i in range(3):
-                try:
-                    self.current_video.thumbnail = picUrl.read()
-                    break
-                except IncompleteRead:
-                    # try again 3 attempts
-                    print('retrying', i)
-            preview_pixmap.loadFromData(self.current_video.thumbnail)
-        self.previewPic.setPixmap(preview_pixmap)
+        self.previewPic.clear()
+        self.current_thumbnail = info.get('thumbnail')
+        if self.current_thumbnail:
+            self.thumbnails.load(self.current_thumbnail)
         self.videoName.setText(info['title'])
         self.videoName.setToolTip(info.get('description'))
         self.widget_5.setVisible('uploader' in info)
@@ -185,13 +341,7 @@ class MainWidget(QMainWindow, Ui_MainWindow):
         # parse table
         self.current_formats = info['formats']
 
-        self.qualityTable.setColumnCount(len(info_columns))
-        self.qualityTable.setHorizontalHeaderLabels(info_columns)
-        self.qualityTable.setRowCount(len(self.current_formats))
-        for i, row in enumerate(self.current_formats):
-            for j, column in enumerate(info_columns):
-                self.qualityTable.setItem(i, j, QTableWidgetItem(str(row.get(column, '') or '')))
-        self.qualityTable.resizeColumnsToContents()
+        self.set_formats(self.current_formats)
 
         qualities = list(set(
             i['format_note'] for i in self.current_formats if 'format_note' in i and i['format_note'][-1] == 'p'))
@@ -203,71 +353,351 @@ class MainWidget(QMainWindow, Ui_MainWindow):
         self.qualityBox.addItems(qualities)
         self.qualityBox.setCurrentIndex(len(qualities) - 1)
 
-        self.continueBtn.setEnabled(True)
         self.downloadProgress.setValue(0)
 
-    def download_video(self):
-        self.saveBtn.setEnabled(False)
-        self.downloadProgress.setValue(0)
+    def thumbnail_loaded(self, url, pixmap):
+        if url == self.current_thumbnail:
+            self.previewPic.setPixmap(pixmap)
 
-        options = {
-            'ffmpeg_location': str(Path.cwd() / 'bin'),
-            'outtmpl': str(Path(self.savePath.text()) / '%(title)s - %(height)sp.%(ext)s'),
-            'default_search': 'ytsearch',
-            'noplaylist': True
-        }
-
-        if self.tabWidget.currentIndex() == 0:
-            if self.soundBox.currentIndex() == 0:
-                options['format'] = f'bestvideo[height={self.qualityBox.currentText()[0:-1]}]+bestaudio/best'
-            elif self.soundBox.currentIndex() == 1:
-                options['format'] = 'bestaudio/best'
-            else:
-                options['format'] = f'bestvideo[height={self.qualityBox.currentText()[0:-1]}]/best'
-        else:
-            print(self.qualityTable.currentRow())
-            options['format'] = self.current_formats[self.qualityTable.currentRow()]['format_id']
+    def parse_playlist_info(self, info, url):
+        entries = flat_entries(info)
+        title = info.get('title') or info.get('id') or url
+        dialog = Ui_PlaylistDialog(self, title, entries)
+        selected = dialog.selected_indexes() if dialog.exec() else []
 
-        if self.formatBox.currentIndex() != 0:
-            options['merge_output_format'] = self.formatBox.currentText()
-            options['postprocessors'] = [{
-                'key': 'FFmpegVideoConvertor',
-                'preferedformat': self.formatBox.currentText()
-            }]
+        self.current_info = None
+        self.current_formats = []
+        self.current_entries = [entries[i] for i in selected]
+        self.saveBtn.setEnabled(bool(self.current_entries))
 
-        self.download_requested.emit(options, self.current_video.url)
+        self.previewPic.clear()
+        self.current_thumbnail = None
+        self.videoName.setText(f'{title} ({len(self.current_entries)} из {len(entries)} видео)')
+        self.videoName.setToolTip(info.get('description'))
+        self.widget_5.setVisible(bool(info.get('uploader')))
+        self.channelText.setText(info.get('uploader'))
+        self.subscribersText.setVisible(False)
+        self.verifiedTick.setVisible(False)
+        for widget in self.widget_1, self.widget_2, self.widget_3, self.widget_4, self.widget_6:
+            widget.setVisible(False)
+        self.set_formats([])
+
+        self.qualityBox.clear()
+        self.qualityBox.addItems(playlist_qualities)
+        self.qualityBox.setCurrentIndex(playlist_qualities.index('1080p'))
 
-    def download_finished(self):
-        print('download_finished')
-        self.saveBtn.setEnabled(True)
-        self.statusbar.showMessage('Скачано', 0)
         self.downloadProgress.setValue(0)
 
-        cur = self.conn.cursor()
-        cur.execute("INSERT INTO history(name, channel, duration, url, path, quality) VALUES (?,?,?,?,?,?)",
-                    (self.current_video.name, self.current_video.channel, self.current_video.duration,
-                     self.current_video.url, self.current_video.path,
-                     self.qualityBox.currentText()))
-        self.conn.commit()
-        with open(Path.cwd() / 'data' / 'previews' / f'{cur.lastrowid}.webp', 'wb') as thumb:
-            thumb.write(self.current_video.thumbnail)
-        self.load_history()
-
-
-    def download_progress(self, d):
-        # pprint(d)
-        print(d['status'])
-        if d['status'] == 'finished':
-            self.current_video.path = d['info_dict'].get('filepath') or d['info_dict']['filename']
-            pprint(d)
-            print('finished download_progress')
-
-        elif d['status'] == 'downloading' or d['status'] == 'processing':
-            p = d['_percent_str']
-            p = p.replace('%', '')
-            self.downloadProgress.setValue(int(float(p)))
-            self.downloadSpeed.setText(d['_speed_str'])
-            self.statusbar.showMessage(f"Осталось {d['eta'] or ''} сек.")
+    def set_formats(self, formats):
+        self.format_model.set_formats(formats)
+        self.codecFilter.blockSignals(True)
+        codec = self.codecFilter.currentData()
+        self.codecFilter.clear()
+        self.codecFilter.addItem('Все кодеки', '')
+        for name in self.format_model.codec_names():
+            self.codecFilter.addItem(name, name)
+        # the chosen codec is kept for the next video when it has one
+        self.codecFilter.setCurrentIndex(max(0, self.codecFilter.findData(codec)))
+        self.codecFilter.blockSignals(False)
+        self.format_filter.set_codec(self.codecFilter.currentData())
+        fit_columns(self.qualityTable)
+
+    def selected_format(self) -> Optional[dict]:
+        index = self.qualityTable.currentIndex()
+        if not index.isValid() or not self.qualityTable.selectionModel().isRowSelected(index.row()):
+            return None
+        return index.data(FORMAT_ROLE)
+
+    def format_plan(self, height_filter='=') -> tuple[FormatPlan, str]:
+        container = self.formatBox.currentText() if self.formatBox.currentIndex() != 0 else None
+        duration = self.current_info.get('duration') if self.current_info else None
+        quality = self.qualityBox.currentText()
+        if self.tabWidget.currentIndex() == 0 or self.current_entries is not None:
+            # entries of a playlist are not resolved yet, so their formats are unknown
+            formats = None if self.current_entries is not None else self.current_formats
+            plan = plan_formats(self.soundBox.currentIndex(), container, int(quality[0:-1]) if quality else None,
+                                height_filter, formats, duration)
+        else:
+            selected_format = self.selected_format()
+            plan = plan_format(selected_format, container, duration)
+            quality = selected_format.get('format_note') or selected_format['format_id']
+        return plan, quality
+
+    def update_format_plan(self):
+        if self.current_info is None and self.current_entries is None or \
+                self.tabWidget.currentIndex() == 1 and self.selected_format() is None:
+            self.planText.clear()
+            return
+        plan, _ = self.format_plan('<=' if self.current_entries is not None else '=')
+        if not plan.postprocessors:
+            self.planText.clear()
+        elif self.current_entries is not None:
+            self.planText.setText('Перекодирование при необходимости')
+        elif not plan.transcode:
+            self.planText.setText('Без перекодирования')
+        elif plan.cost is None:
+            self.planText.setText('Перекодирование')
+        else:
+            self.planText.setText(f'Перекодирование ≈ {format_cost(plan.cost)}')
+
+    def download_options(self, height_filter='='):
+        plan, quality = self.format_plan(height_filter)
+        connections = self.connectionsBox.value() if self.turboBox.isChecked() else None
+        return download_options(self.savePath.text(), plan, connections), quality
+
+    def download_video(self):
+        if self.current_entries is not None:
+            self.download_playlist()
+            return
+        if self.tabWidget.currentIndex() == 1 and self.selected_format() is None:
+            self.statusbar.showMessage('Выберите формат в таблице', 0)
+            return
+        options, quality = self.download_options()
+        video = dataclasses.replace(self.current_video, quality=quality)
+        info = self.current_info
+        self.find_download(video, lambda entry: self.confirm_download(video, options, info, entry))
+
+    def find_download(self, video: Video, callback):
+        if self.queue.find(video) is not None:
+            self.statusbar.showMessage(f'Уже в очереди: {video.name}', 0)
+            return
+        if not video.extractor or not video.video_id:
+            callback(None)
+            return
+        # the same video behind a short, mobile or playlist link resolves to the same extractor and id
+        query, params = completed_download_query(video.extractor, video.video_id, video.quality)
+        self.db.query(query, params, lambda rows: callback(HistoryEntry(*rows[0]) if rows else None))
+
+    def confirm_download(self, video, options, info, entry: Optional[HistoryEntry]):
+        if entry is None:
+            self.queue.add(video, options, info)
+            return
+        exists = Path(entry.path).exists()
+        box = QMessageBox(QMessageBox.Icon.Question, 'Уже скачано',
+                          f'«{entry.name}» в качестве {entry.quality} уже скачано:\n{entry.path}' +
+                          ('' if exists else '\n\nФайл не найден.'), parent=self)
+        skip = box.addButton('Пропустить', QMessageBox.ButtonRole.RejectRole)
+        relink = None if exists else box.addButton('Указать файл', QMessageBox.ButtonRole.ActionRole)
+        download = box.addButton('Скачать заново', QMessageBox.ButtonRole.AcceptRole)
+        box.setDefaultButton(skip if exists else download)
+        box.exec()
+        if box.clickedButton() == download:
+            self.queue.add(video, options, info)
+        elif relink is not None and box.clickedButton() == relink:
+            self.relink_history_entry(entry)
+
+    def relink_history_entry(self, entry):
+        path, _ = QFileDialog.getOpenFileName(self, 'Где теперь файл', str(Path(entry.path).parent))
+        if not path:
+            return
+        self.db.execute("UPDATE history SET path = ? WHERE id = ?", (path, entry.id))
+        self.history_model.update(dataclasses.replace(entry, path=path))
+
+    def download_playlist(self):
+        # entries differ in available heights, so take the best one up to the selected
+        options, quality = self.download_options('<=')
+        self.resolver.resolve(self.current_entries, options, quality, self.refreshBox.isChecked())
+        self.statusbar.showMessage(f'Получение информации о {len(self.current_entries)} видео...')
+
+    def playlist_entry_resolved(self, playlist_entry, info, options, quality):
+        # the window may show another video or playlist by now, everything needed comes with the entry
+        video = video_from_info(info, info.get('webpage_url') or entry_url(playlist_entry), quality)
+        self.find_download(video, lambda entry: self.playlist_entry_found(video, options, info, entry))
+
+    def playlist_entry_found(self, video, options, info, entry: Optional[HistoryEntry]):
+        # asking about every entry of a long playlist is too much, so the ones still on disk are just skipped
+        if entry is not None and Path(entry.path).exists():
+            self.statusbar.showMessage(f'Уже скачано: {video.name}', 0)
+            return
+        self.queue.add(video, options, info)
+        if video.thumbnail_url:
+            # fetched into the disk cache while the video downloads, used as the history preview
+            self.thumbnails.load(video.thumbnail_url)
+
+    def playlist_entry_failed(self, entry, message):
+        self.statusbar.showMessage(f"Ошибка: {entry.get('title') or entry_url(entry)}: {message}", 0)
+
+    def selected_jobs_action(self, action):
+        for index in self.queueTable.selectionModel().selectedRows():
+            action(self.queue_rows[index.row()])
+
+    def job_added(self, job_id):
+        job = self.queue.jobs[job_id]
+        row = self.queueTable.rowCount()
+        self.queue_rows.append(job_id)
+        self.queueTable.insertRow(row)
+        name = QTableWidgetItem(job.video.name)
+        name.setToolTip(job.video.url)
+        self.queueTable.setItem(row, 0, name)
+        for column in range(1, self.queueTable.columnCount()):
+            self.queueTable.setItem(row, column, QTableWidgetItem())
+        self.job_changed(job_id)
+        if job.record_id is None:
+            self.db.execute("INSERT INTO download_jobs(video, options, state, progress, part_files, created_at) "
+                            "VALUES (?,?,?,?,?,?)", new_job_params(job),
+                            lambda record_id: self.job_saved(job_id, record_id))
+
+    def offer_resume(self, rows):
+        if not rows:
+            return
+        jobs = [job_from_record(row) for row in rows]
+        part_size = sum(Path(part_file).stat().st_size for *_, part_files in jobs
+                        for part_file in part_files if Path(part_file).exists())
+        box = QMessageBox(QMessageBox.Icon.Question, 'Незавершённые загрузки',
+                          f'Осталось незавершённых загрузок: {len(jobs)}, '
+                          f'уже скачано {part_size / 1024 / 1024:.1f} МБ. Продолжить их?', parent=self)
+        resume = box.addButton('Продолжить', QMessageBox.ButtonRole.AcceptRole)
+        discard = box.addButton('Удалить', QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton('Позже', QMessageBox.ButtonRole.RejectRole)
+        box.setDefaultButton(resume)
+        box.exec()
+        if box.clickedButton() == resume:
+            for record_id, video, options, state, progress, part_files in jobs:
+                # yt-dlp continues from the .part files left by the previous run
+                job_id = self.queue.add(video, options, paused=state in (JobState.PAUSED, JobState.FAILED),
+                                        record_id=record_id)
+                job = self.queue.jobs[job_id]
+                job.part_files.update(part_files)
+                job.progress = max(job.progress, progress)
+                self.job_changed(job_id)
+        elif box.clickedButton() == discard:
+            for record_id, video, options, state, progress, part_files in jobs:
+                remove_part_files(part_files)
+            self.db.execute_many("DELETE FROM download_jobs WHERE id = ?", [(row[0],) for row in rows])
+
+    def job_saved(self, job_id, record_id):
+        self.queue.jobs[job_id].record_id = record_id
+        self.save_job(job_id)
+
+    def save_job(self, job_id):
+        job = self.queue.jobs[job_id]
+        if job.record_id is None:
+            return
+        if job.state in (JobState.DONE, JobState.CANCELLED):
+            self.db.execute("DELETE FROM download_jobs WHERE id = ?", (job.record_id,))
+        else:
+            self.db.execute("UPDATE download_jobs SET state = ?, progress = ?, part_files = ? WHERE id = ?",
+                            job_params(job) + (job.record_id,))
+
+    def checkpoint_jobs(self):
+        running = [job for job in self.queue.jobs.values()
+                   if job.state == JobState.RUNNING and job.record_id is not None]
+        if running:
+            self.db.execute_many("UPDATE download_jobs SET state = ?, progress = ?, part_files = ? WHERE id = ?",
+                                 [job_params(job) + (job.record_id,) for job in running])
+
+    def job_changed(self, job_id):
+        job = self.queue.jobs[job_id]
+        row = self.queue_rows.index(job_id)
+        self.queueTable.item(row, 1).setText(job.state.value)
+        self.queueTable.item(row, 1).setToolTip(job.error)
+        self.queueTable.item(row, 2).setText(f'{job.progress:.1f}%')
+        self.queueTable.item(row, 3).setText(format_speed(job.speed))
+        if job.state == JobState.FAILED:
+            self.statusbar.showMessage(f'Ошибка: {job.error}', 0)
+        self.update_total_progress()
+
+    def update_total_progress(self):
+        running = [job for job in self.queue.jobs.values() if job.state == JobState.RUNNING]
+        if not running:
+            self.downloadProgress.setValue(0)
+            self.downloadSpeed.setText(format_speed(None))
+            return
+        self.downloadProgress.setValue(int(sum(job.progress for job in running) / len(running)))
+        self.downloadSpeed.setText(format_speed(sum(job.speed or 0 for job in running)))
+        eta = int(max(job.eta or 0 for job in running))
+        self.statusbar.showMessage(f"Загрузок: {len(running)}, осталось {eta or ''} сек.")
+
+    def download_finished(self, job_id):
+        job = self.queue.jobs[job_id]
+        video = job.video
+        self.statusbar.showMessage(f'Скачано: {video.name}', 0)
+
+        try:
+            filesize = Path(video.path).stat().st_size
+        except (OSError, TypeError):
+            filesize = None
+        throughput = filesize / job.download_time if filesize and job.download_time else None
+        self.db.execute("INSERT INTO history(name, channel, duration, url, path, quality, created_at, "
+                        "duration_seconds, filesize, download_time, throughput, format_id, extractor, video_id) "
+                        "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                        (video.name, video.channel, video.duration, video.url, video.path, video.quality,
+                         int(time.time()), video.duration_seconds, filesize, job.download_time, throughput,
+                         video.format_id, video.extractor, video.video_id),
+                        lambda entry_id: self.history_added(entry_id, video, job))
+
+    def save_metrics(self, job, history_id):
+        # the number of workers tells how many downloads could have run at the same time
+        query, params = metrics_insert(job, history_id, self.queue.workers_count)
+        self.db.execute(query, params)
+        self.refresh_stats()
+
+    def stats_since(self) -> float:
+        period = STATS_PERIODS[self.statsPeriod.currentIndex()]
+        return time.time() - period if period else 0
+
+    def refresh_stats(self):
+        # queried only while the tab is shown, new downloads refresh it as well
+        if self.sideTabs.currentWidget() is not self.statsTab:
+            return
+        since = self.stats_since()
+        query, params = metrics_summary_query(since)
+        self.db.query(query, params, lambda rows: self.db.query(
+            *metrics_intervals_query(since), lambda intervals: self.show_stats(rows[0], intervals)))
+        query, params = slow_extractors_query(since, SLOW_EXTRACTORS)
+        self.db.query(query, params, self.show_slow_extractors)
+
+    def show_stats(self, summary, intervals):
+        jobs, failed, total_bytes, download_time, ttfb, retries, postprocess_time = summary
+        usage = utilization(intervals)
+        self.statsJobsText.setText(f'{jobs}, с ошибкой {failed}' if failed else str(jobs))
+        self.statsBytesText.setText(f'{total_bytes / 1024 / 1024:.1f} МБ')
+        self.statsThroughputText.setText(format_speed(total_bytes / usage.busy_time if usage.busy_time else None))
+        self.statsUtilizationText.setText('—' if usage.ratio is None else f'{usage.ratio:.0%}')
+        self.statsTtfbText.setText(format_seconds(ttfb))
+        self.statsRetriesText.setText(str(retries))
+        self.statsPostprocessText.setText(format_seconds(postprocess_time))
+
+    def show_slow_extractors(self, rows):
+        self.slowExtractorsTable.setRowCount(len(rows))
+        for row, (source, jobs, speed, ttfb, retries) in enumerate(rows):
+            for column, text in enumerate((source, str(jobs), format_speed(speed), format_seconds(ttfb),
+                                           str(retries))):
+                self.slowExtractorsTable.setItem(row, column, QTableWidgetItem(text))
+
+    def history_added(self, entry_id, video, job):
+        self.save_metrics(job, entry_id)
+        if video.thumbnail_url:
+            self.history_model.add_preview(entry_id, lambda: self.thumbnails.data(video.thumbnail_url))
+        self.history_model.prepend(HistoryEntry(entry_id, video.name, video.channel, video.duration,
+                                                video.url, video.path, video.quality))
+        self.add_history_filter_values(video)
+
+    def history_context_menu(self, pos):
+        index = self.historyList.indexAt(pos)
+        if not index.isValid():
+            return
+        entry = index.data(Qt.ItemDataRole.UserRole)
+        menu = QMenu(self.historyList)
+        menu.addAction('Открыть', lambda: open_downloaded_video(entry.path))
+        menu.addAction('Переименовать', lambda: self.rename_history_entry(entry))
+        menu.addAction('Удалить из истории', lambda: self.delete_history_entry(entry))
+        menu.exec(self.historyList.viewport().mapToGlobal(pos))
+
+    def rename_history_entry(self, entry):
+        name, ok = QInputDialog.getText(self, 'Переименовать', 'Название видео:', text=entry.name)
+        if not ok or not name:
+            return
+        self.db.execute("UPDATE history SET name = ? WHERE id = ?", (name, entry.id))
+        self.history_model.update(dataclasses.replace(entry, name=name))
+
+    def delete_history_entry(self, entry):
+        self.db.execute("DELETE FROM history WHERE id = ?", (entry.id,))
+        self.history_model.remove(entry.id)
+
+    def download_progress(self, job_id, update):
+        if update.status == 'downloading':
+            self.job_changed(job_id)
 
     def sound_formats_changed(self, ind):
         if ind == 1:
@@ -278,9 +708,23 @@ class MainWidget(QMainWindow, Ui_MainWindow):
         self.formatBox.addItems(items)
         self.formatBox.setCurrentIndex(1)
 
+    def closeEvent(self, event):
+        self.checkpoint_jobs()
+        self.resolver.shutdown()
+        self.thumbnails.shutdown()
+        self.history_model.shutdown()
+        self.db.close()
+        self.queue.shutdown()
+        self.extractor.shutdown()
+        super().closeEvent(event)
+
 
 if __name__ == '__main__':
+    log_listener = logs.setup()
     app = QApplication(sys.argv)
     ex = MainWidget()
+    startup.mark('window')
     ex.show()
-    sys.exit(app.exec())
+    code = app.exec()
+    log_listener.stop()
+    sys.exit(code)
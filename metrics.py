@@ -0,0 +1,39 @@
+from dataclasses import dataclass
+from typing import Optional
+
+# the dashboard looks at the recent downloads only, 0 means all of them
+STATS_PERIODS = [24 * 60 * 60, 7 * 24 * 60 * 60, 30 * 24 * 60 * 60, 0]
+SLOW_EXTRACTORS = 10
+
+
+@dataclass(slots=True)
+class Utilization:
+    # seconds when at least one download was running
+    busy_time: float
+    # share of the worker slots used while busy, 1.0 means every worker was downloading all the time
+    ratio: Optional[float]
+
+
+def utilization(intervals: list[tuple[float, float, int]]) -> Utilization:
+    # intervals are (started_at, download_time, workers) sorted by start; a job is counted as running
+    # from its first start for as long as it was downloading, which is exact for jobs that were not paused
+    busy_time = 0.0
+    capacity = 0.0
+    used = 0.0
+    block_start = block_end = None
+    block_workers = 0
+    for started_at, download_time, workers in intervals:
+        used += download_time
+        end = started_at + download_time
+        if block_end is None or started_at > block_end:
+            if block_end is not None:
+                busy_time += block_end - block_start
+                capacity += (block_end - block_start) * block_workers
+            block_start, block_end, block_workers = started_at, end, workers
+        else:
+            block_end = max(block_end, end)
+            block_workers = max(block_workers, workers)
+    if block_end is not None:
+        busy_time += block_end - block_start
+        capacity += (block_end - block_start) * block_workers
+    return Utilization(busy_time, min(used / capacity, 1.0) if capacity else None)
@@ -0,0 +1,193 @@
+import sqlite3
+from typing import Optional
+
+
+def parse_duration(duration: str) -> Optional[float]:
+    try:
+        seconds = 0.0
+        for part in duration.split(':'):
+            seconds = seconds * 60 + float(part)
+    except (AttributeError, ValueError):
+        return None
+    return seconds
+
+
+def columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info(`{table}`)")]
+
+
+def create_history(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS `history` (
+        `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+        `name` TEXT NOT NULL,
+        `channel` TEXT NOT NULL,
+        `duration` TEXT NOT NULL,
+        `url` TEXT NOT NULL,
+        `path` TEXT NOT NULL,
+        `quality` TEXT NOT NULL
+        )""")
+
+
+def add_history_search(conn: sqlite3.Connection):
+    if 'created_at' not in columns(conn, 'history'):
+        conn.execute("ALTER TABLE `history` ADD COLUMN `created_at` INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS `history_channel` ON `history` (`channel`)")
+    conn.execute("CREATE INDEX IF NOT EXISTS `history_quality` ON `history` (`quality`)")
+    conn.execute("CREATE INDEX IF NOT EXISTS `history_created_at` ON `history` (`created_at`)")
+
+    fts_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_fts'").fetchone()
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS `history_fts` USING fts5(
+            name, channel, url, content='history', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )""")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS `history_fts_insert` AFTER INSERT ON `history` BEGIN
+            INSERT INTO history_fts(rowid, name, channel, url) VALUES (new.id, new.name, new.channel, new.url);
+        END""")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS `history_fts_delete` AFTER DELETE ON `history` BEGIN
+            INSERT INTO history_fts(history_fts, rowid, name, channel, url)
+            VALUES ('delete', old.id, old.name, old.channel, old.url);
+        END""")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS `history_fts_update` AFTER UPDATE OF name, channel, url ON `history` BEGIN
+            INSERT INTO history_fts(history_fts, rowid, name, channel, url)
+            VALUES ('delete', old.id, old.name, old.channel, old.url);
+            INSERT INTO history_fts(rowid, name, channel, url) VALUES (new.id, new.name, new.channel, new.url);
+        END""")
+    if not fts_exists:
+        # index the rows that were downloaded before the search was added
+        conn.execute("INSERT INTO history_fts(history_fts) VALUES ('rebuild')")
+
+
+def add_history_stats(conn: sqlite3.Connection):
+    for column, column_type in [('duration_seconds', 'REAL'), ('filesize', 'INTEGER'), ('download_time', 'REAL'),
+                                ('throughput', 'REAL'), ('format_id', 'TEXT'), ('extractor', 'TEXT'),
+                                ('video_id', 'TEXT')]:
+        conn.execute(f"ALTER TABLE `history` ADD COLUMN `{column}` {column_type}")
+    conn.execute("CREATE INDEX `history_video` ON `history` (`extractor`, `video_id`)")
+    conn.executemany("UPDATE `history` SET `duration_seconds` = ? WHERE `id` = ?",
+                     [(parse_duration(duration), entry_id)
+                      for entry_id, duration in conn.execute("SELECT id, duration FROM history")])
+
+
+def add_completed_downloads(conn: sqlite3.Connection):
+    # the latest download of every video in every quality, looked up before a new download starts
+    conn.execute("""
+        CREATE TABLE `completed_downloads` (
+        `extractor` TEXT NOT NULL,
+        `video_id` TEXT NOT NULL,
+        `quality` TEXT NOT NULL,
+        `history_id` INTEGER NOT NULL,
+        PRIMARY KEY (`extractor`, `video_id`, `quality`)
+        ) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX `completed_downloads_history` ON `completed_downloads` (`history_id`)")
+    conn.execute("""
+        CREATE TRIGGER `completed_downloads_insert` AFTER INSERT ON `history`
+        WHEN new.extractor IS NOT NULL AND new.video_id IS NOT NULL BEGIN
+            INSERT OR REPLACE INTO completed_downloads(extractor, video_id, quality, history_id)
+            VALUES (new.extractor, new.video_id, new.quality, new.id);
+        END""")
+    conn.execute("""
+        CREATE TRIGGER `completed_downloads_delete` AFTER DELETE ON `history` BEGIN
+            DELETE FROM completed_downloads WHERE history_id = old.id;
+            -- an earlier download of the same video takes the place of the deleted one
+            INSERT OR IGNORE INTO completed_downloads(extractor, video_id, quality, history_id)
+            SELECT extractor, video_id, quality, id FROM history
+            WHERE extractor = old.extractor AND video_id = old.video_id AND quality = old.quality
+            ORDER BY id DESC LIMIT 1;
+        END""")
+    conn.execute("""
+        INSERT OR REPLACE INTO completed_downloads(extractor, video_id, quality, history_id)
+        SELECT extractor, video_id, quality, id FROM history
+        WHERE extractor IS NOT NULL AND video_id IS NOT NULL ORDER BY id""")
+
+
+def add_download_jobs(conn: sqlite3.Connection):
+    # unfinished downloads, so they can be resumed after a restart
+    conn.execute("""
+        CREATE TABLE `download_jobs` (
+        `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+        `video` TEXT NOT NULL,
+        `options` TEXT NOT NULL,
+        `state` TEXT NOT NULL,
+        `progress` REAL NOT NULL DEFAULT 0,
+        `part_files` TEXT NOT NULL DEFAULT '[]',
+        `created_at` INTEGER NOT NULL
+        )""")
+
+
+def add_job_metrics(conn: sqlite3.Connection):
+    # one row per finished or failed download, times are in seconds and speeds in bytes per second
+    conn.execute("""
+        CREATE TABLE `job_metrics` (
+        `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+        `history_id` INTEGER,
+        `url` TEXT NOT NULL,
+        `extractor` TEXT,
+        `host` TEXT,
+        `state` TEXT NOT NULL,
+        `bytes` INTEGER NOT NULL DEFAULT 0,
+        `started_at` REAL NOT NULL,
+        `finished_at` REAL NOT NULL,
+        `wall_time` REAL NOT NULL,
+        `download_time` REAL NOT NULL,
+        `ttfb` REAL,
+        `avg_speed` REAL,
+        `peak_speed` REAL,
+        `postprocess_time` REAL,
+        `retries` INTEGER NOT NULL DEFAULT 0,
+        `workers` INTEGER NOT NULL
+        )""")
+    conn.execute("CREATE INDEX `job_metrics_finished_at` ON `job_metrics` (`finished_at`)")
+    conn.execute("CREATE INDEX `job_metrics_history` ON `job_metrics` (`history_id`)")
+    # history entries are deleted by the user, their metrics still count
+    conn.execute("""
+        CREATE TRIGGER `history_metrics_delete` AFTER DELETE ON `history` BEGIN
+            UPDATE job_metrics SET history_id = NULL WHERE history_id = old.id;
+        END""")
+
+
+def add_history_previews(conn: sqlite3.Connection):
+    # previews scaled for the history list, one for normal and one for high density screens
+    conn.execute("""
+        CREATE TABLE `history_previews` (
+        `history_id` INTEGER PRIMARY KEY,
+        `small` BLOB NOT NULL,
+        `large` BLOB NOT NULL
+        )""")
+    conn.execute("""
+        CREATE TRIGGER `history_previews_delete` AFTER DELETE ON `history` BEGIN
+            DELETE FROM history_previews WHERE history_id = old.id;
+        END""")
+
+
+# append only, the position of a migration in the list is its schema version
+MIGRATIONS = [
+    create_history,
+    add_history_search,
+    add_history_stats,
+    add_completed_downloads,
+    add_download_jobs,
+    add_job_metrics,
+    add_history_previews,
+]
+
+
+def migrate(conn: sqlite3.Connection):
+    conn.execute("CREATE TABLE IF NOT EXISTS `schema_version` (`version` INTEGER NOT NULL)")
+    row = conn.execute("SELECT version FROM schema_version").fetchone()
+    version = row[0] if row else 0
+    for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+        # sqlite3 does not open a transaction for DDL by itself, so a failed migration would stay half-applied
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute("DELETE FROM schema_version")
+            conn.execute("INSERT INTO schema_version(version) VALUES (?)", (number,))
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
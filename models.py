@@ -0,0 +1,106 @@
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional
+
+
+@dataclass
+class Video:
+    name: str
+    channel: str
+    duration: str
+    url: str
+    quality: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    path: Optional[str] = None
+    duration_seconds: Optional[float] = None
+    extractor: Optional[str] = None
+    video_id: Optional[str] = None
+    format_id: Optional[str] = None
+
+
+@dataclass
+class HistoryEntry:
+    id: int
+    name: str
+    channel: str
+    duration: str
+    url: str
+    path: str
+    quality: str
+
+
+@dataclass
+class HistoryFilter:
+    text: str = ''
+    channel: str = ''
+    quality: str = ''
+    date_from: Optional[int] = None
+    date_to: Optional[int] = None
+
+    def is_empty(self):
+        return self == HistoryFilter()
+
+
+@dataclass(slots=True)
+class ProgressUpdate:
+    status: str
+    percent: Optional[float] = None
+    speed: Optional[float] = None
+    eta: Optional[float] = None
+    part_file: Optional[str] = None
+    path: Optional[str] = None
+    format_id: Optional[str] = None
+
+
+@dataclass(slots=True)
+class JobMetrics:
+    bytes: int = 0
+    # from the start of a run to the first received byte
+    ttfb: Optional[float] = None
+    peak_speed: Optional[float] = None
+    retries: int = 0
+    host: Optional[str] = None
+    # wall clock time of the first run
+    started_at: Optional[float] = None
+    postprocess_time: Optional[float] = None
+
+    def add_run(self, run: 'JobMetrics'):
+        # a resumed run counts the bytes written by the runs before it as well
+        self.bytes = max(self.bytes, run.bytes)
+        if self.ttfb is None:
+            self.ttfb = run.ttfb
+        if run.peak_speed is not None:
+            self.peak_speed = max(self.peak_speed or 0, run.peak_speed)
+        self.retries += run.retries
+        self.host = self.host or run.host
+
+
+class JobState(Enum):
+    QUEUED = 'В очереди'
+    RUNNING = 'Загрузка'
+    POSTPROCESSING = 'Обработка'
+    PAUSED = 'Пауза'
+    FAILED = 'Ошибка'
+    DONE = 'Готово'
+    CANCELLED = 'Отменено'
+
+
+@dataclass
+class DownloadJob:
+    id: int
+    video: Video
+    options: dict
+    info: Optional[dict] = None
+    state: JobState = JobState.QUEUED
+    progress: float = 0
+    speed: Optional[float] = None
+    eta: Optional[int] = None
+    error: Optional[str] = None
+    part_files: set[str] = field(default_factory=set)
+    started_at: Optional[float] = None
+    postprocess_started_at: Optional[float] = None
+    metrics: JobMetrics = field(default_factory=JobMetrics)
+    # id in the download_jobs table, set once the job is saved
+    record_id: Optional[int] = None
+    # seconds spent in a worker, pauses and time in the queue are not counted
+    download_time: float = 0
@@ -0,0 +1,60 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from cache import InfoCache
+from engine import entry_url, error_message, ytdlp_log
+import logs
+
+RESOLVE_WORKERS_COUNT = 8
+
+log = logging.getLogger(__name__)
+
+
+class PlaylistResolver(QObject):
+    # entry, info, and the options and quality the entry was submitted with
+    entry_resolved = pyqtSignal(object, object, dict, str)
+    entry_failed = pyqtSignal(object, str)
+
+    def __init__(self, cache: InfoCache, workers_count: int = RESOLVE_WORKERS_COUNT):
+        super().__init__()
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(workers_count, thread_name_prefix='playlist')
+        self.generation = 0
+
+    def resolve(self, entries: list[dict], options: dict, quality: str, refresh: bool = False):
+        # every batch carries its own options, so a playlist started later does not change the earlier ones
+        for entry in entries:
+            self.executor.submit(self.resolve_entry, self.generation, entry, options, quality, refresh)
+
+    def resolve_entry(self, generation, entry, options, quality, refresh):
+        if generation != self.generation:
+            return
+        from yt_dlp import YoutubeDL
+        from yt_dlp.utils import YoutubeDLError
+        url = None
+        started = time.monotonic()
+        try:
+            url = entry_url(entry)
+            with YoutubeDL({'noplaylist': True, 'logger': ytdlp_log}) as ydl:
+                info = self.cache.extract_info(ydl, url, refresh)
+        except Exception as e:
+            if not isinstance(e, YoutubeDLError):
+                log.exception('Resolving %s failed', url)
+            logs.timing('extraction', time.monotonic() - started, url=url, refresh=refresh, failed=True)
+            if generation == self.generation:
+                self.entry_failed.emit(entry, error_message(e))
+        else:
+            logs.timing('extraction', time.monotonic() - started, url=url, refresh=refresh)
+            if generation == self.generation:
+                self.entry_resolved.emit(entry, info, options, quality)
+
+    def cancel(self):
+        # results of the entries submitted before are dropped
+        self.generation += 1
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,44 @@
+from concurrent.futures import Future
+from typing import Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from engine import FFMPEG_THREADS, FFMPEG_NICE, postprocess_executor, run_postprocessors, error_message
+
+
+class PostprocessPool(QObject):
+    finished = pyqtSignal(int, str)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, workers_count: Optional[int] = None, threads: int = FFMPEG_THREADS,
+                 niceness: int = FFMPEG_NICE):
+        super().__init__()
+        self.threads = threads
+        self.executor = postprocess_executor(workers_count, threads, niceness)
+        self.futures: dict[int, Future] = {}
+        self.finished.connect(lambda job_id: self.futures.pop(job_id, None))
+        self.failed.connect(lambda job_id: self.futures.pop(job_id, None))
+
+    def submit(self, job_id: int, path: str, postprocessors: list[dict], ffmpeg_location: Optional[str] = None):
+        future = self.executor.submit(run_postprocessors, path, postprocessors, ffmpeg_location, self.threads)
+        self.futures[job_id] = future
+        future.add_done_callback(lambda f: self.done(job_id, f))
+
+    def done(self, job_id: int, future: Future):
+        # called in a thread of the executor, the signals are delivered to the GUI thread
+        if future.cancelled():
+            return
+        try:
+            path = future.result()
+        except Exception as e:
+            self.failed.emit(job_id, error_message(e))
+        else:
+            self.finished.emit(job_id, path)
+
+    def cancel(self, job_id: int) -> bool:
+        # a conversion that has already started runs to the end
+        future = self.futures.pop(job_id, None)
+        return future is not None and future.cancel()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,72 @@
+import yt_dlp
+from yt_dlp.downloader import PROTOCOL_MAP, HttpFD
+from yt_dlp.downloader.fragment import FragmentFD
+from yt_dlp.networking import Request
+from yt_dlp.networking.exceptions import RequestError
+from yt_dlp.utils import parse_http_range
+
+RANGED_PROTOCOL = 'http_ranged'
+SEGMENT_SIZE = 8 * 1024 * 1024
+SEGMENT_RETRIES = 10
+
+
+# downloads a plain http(s) file as byte ranges fetched over several connections at once;
+# segments go through the fragment machinery of yt-dlp, so each one is retried on its own
+# and the .ytdl state file lets an interrupted download continue from the last written segment
+class RangedHttpFD(FragmentFD):
+    FD_NAME = 'ranged'
+
+    def file_size(self, info_dict):
+        # the server has to honour Range, otherwise every segment would be the whole file
+        request = Request(info_dict['url'], headers={**info_dict.get('http_headers', {}), 'Range': 'bytes=0-0'})
+        try:
+            with self.ydl.urlopen(request) as response:
+                if response.status != 206:
+                    return None
+                _, _, total = parse_http_range(response.headers.get('Content-Range'))
+                return total
+        except RequestError:
+            return None
+
+    def real_download(self, filename, info_dict):
+        size = self.file_size(info_dict)
+        if not size or size < SEGMENT_SIZE * 2:
+            fd = HttpFD(self.ydl, self.params)
+            for hook in self._progress_hooks:
+                fd.add_progress_hook(hook)
+            return fd.real_download(filename, info_dict)
+
+        segments_count = -(-size // SEGMENT_SIZE)
+        ctx = {
+            'filename': filename,
+            'total_frags': segments_count,
+        }
+        self._prepare_and_start_frag_download(ctx, info_dict)
+        segments = [{
+            'frag_index': index + 1,
+            'url': info_dict['url'],
+            'byte_range': {'start': index * SEGMENT_SIZE, 'end': min((index + 1) * SEGMENT_SIZE, size)},
+        } for index in range(ctx['fragment_index'], segments_count)]
+        # a skipped segment would leave a hole in the file
+        return self.download_and_append_fragments(ctx, segments, info_dict, is_fatal=lambda index: True)
+
+
+PROTOCOL_MAP.setdefault(RANGED_PROTOCOL, RangedHttpFD)
+
+
+def segmented_options(connections: int) -> dict:
+    return {
+        'segmented_http': True,
+        'concurrent_fragment_downloads': connections,
+        'fragment_retries': SEGMENT_RETRIES,
+    }
+
+
+# with the 'segmented_http' option direct http(s) formats are downloaded by RangedHttpFD,
+# 'concurrent_fragment_downloads' sets the connections count for them as well as for DASH and HLS fragments
+class SegmentedYoutubeDL(yt_dlp.YoutubeDL):
+    def dl(self, name, info, subtitle=False, test=False):
+        if self.params.get('segmented_http') and not subtitle and not test and name != '-' and \
+                info.get('protocol') in ('http', 'https'):
+            info = {**info, 'protocol': RANGED_PROTOCOL}
+        return super().dl(name, info, subtitle, test)
@@ -0,0 +1,33 @@
+import os
+import sys
+import time
+
+# main.py imports this module before anything else, so the marks count from the start of the app
+STARTED = time.perf_counter()
+# set to print the startup report to stderr, 'quit' also closes the app once it has started,
+# which is handy to time the startup repeatedly
+REPORT_VARIABLE = 'PYQYT_STARTUP_REPORT'
+
+marks: dict[str, float] = {}
+
+
+def mark(name: str) -> bool:
+    # only the first time a stage is reached counts
+    if name in marks:
+        return False
+    marks[name] = (time.perf_counter() - STARTED) * 1000
+    return True
+
+
+def report_mode() -> str:
+    return os.environ.get(REPORT_VARIABLE, '')
+
+
+def completed(stages: tuple[str, ...]) -> bool:
+    return all(stage in marks for stage in stages)
+
+
+def print_report():
+    width = max(map(len, marks), default=0)
+    lines = [f'  {name:<{width}} {ms:8.1f} ms' for name, ms in sorted(marks.items(), key=lambda item: item[1])]
+    print('Время запуска:', *lines, sep='\n', file=sys.stderr)
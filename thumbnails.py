@@ -0,0 +1,234 @@
+import hashlib
+import http.client
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit, urljoin
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+
+import logs
+
+FETCH_WORKERS_COUNT = 4
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 0.5
+FETCH_TIMEOUT = 15
+MAX_REDIRECTS = 5
+PIXMAP_CACHE_SIZE = 64
+# the disk cache is pruned to this size at startup, the least recently used pictures go first
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+log = logging.getLogger(__name__)
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+class ThumbnailStore:
+    def __init__(self, directory: Path, index_path: str, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.index_path = index_path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # opened by the first fetch rather than while the window is starting; only used under the lock
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS `thumbnail_urls` (
+                `url` TEXT PRIMARY KEY,
+                `digest` TEXT NOT NULL
+                )""")
+            self._conn.commit()
+        return self._conn
+
+    def blob_path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / digest
+
+    def get(self, url: str) -> Optional[bytes]:
+        with self.lock:
+            row = self.conn.execute("SELECT digest FROM thumbnail_urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        path = self.blob_path(row[0])
+        try:
+            data = path.read_bytes()
+            # the modification time tells prune() which pictures were used last
+            path.touch()
+            return data
+        except FileNotFoundError:
+            return None
+
+    def put(self, url: str, data: bytes):
+        # blobs are named by their content, so the same picture behind different urls is stored once
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO thumbnail_urls(url, digest) VALUES (?,?)", (url, digest))
+            self.conn.commit()
+
+    def prune(self):
+        if not self.directory.exists():
+            return
+        blobs = []
+        for path in self.directory.glob('*/*'):
+            if path.suffix == '.tmp':
+                # left by a write that was interrupted
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            blobs.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in blobs)
+        if total <= self.max_size:
+            return
+        removed = []
+        for _, size, path in sorted(blobs):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            removed.append((path.name,))
+            total -= size
+        with self.lock:
+            self.conn.executemany("DELETE FROM thumbnail_urls WHERE digest = ?", removed)
+            self.conn.commit()
+        log.info('Removed %d thumbnails from the disk cache', len(removed))
+
+
+class ConnectionPool(threading.local):
+    def __init__(self):
+        self.connections: dict[tuple[str, str], http.client.HTTPConnection] = {}
+
+    def get(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        key = scheme, netloc
+        if key not in self.connections:
+            connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            self.connections[key] = connection_class(netloc, timeout=FETCH_TIMEOUT)
+        return self.connections[key]
+
+    def drop(self, scheme: str, netloc: str):
+        connection = self.connections.pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+
+class ThumbnailLoader(QObject):
+    loaded = pyqtSignal(str, QPixmap)
+    failed = pyqtSignal(str, str)
+    fetched = pyqtSignal(str, QImage)
+
+    def __init__(self, store: ThumbnailStore):
+        super().__init__()
+        self.store = store
+        self.pool = ConnectionPool()
+        self.executor = ThreadPoolExecutor(FETCH_WORKERS_COUNT, thread_name_prefix='thumbnail')
+        self.pixmaps: OrderedDict[str, QPixmap] = OrderedDict()
+        self.requested: set[str] = set()
+        self.fetched.connect(self.fetch_finished)
+        self.failed.connect(lambda url: self.requested.discard(url))
+
+    def load(self, url: str):
+        pixmap = self.pixmaps.get(url)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(url)
+            self.loaded.emit(url, pixmap)
+        elif url not in self.requested:
+            self.requested.add(url)
+            self.executor.submit(self.fetch, url)
+
+    def data(self, url: str) -> Optional[bytes]:
+        try:
+            return self.store.get(url)
+        except (OSError, sqlite3.Error) as e:
+            log.warning('Thumbnail %s could not be read: %s', url, e)
+            return None
+
+    def prune(self):
+        self.executor.submit(self.prune_store)
+
+    def prune_store(self):
+        try:
+            self.store.prune()
+        except (OSError, sqlite3.Error) as e:
+            log.warning('Pruning thumbnails failed: %s', e)
+
+    def fetch(self, url):
+        started = time.monotonic()
+        try:
+            data = self.store.get(url)
+            cached = data is not None
+            if not cached:
+                data = self.download(url)
+                self.store.put(url, data)
+        except (OSError, http.client.HTTPException, sqlite3.Error, ThumbnailError) as e:
+            log.warning('Thumbnail %s failed: %s', url, e)
+            self.failed.emit(url, str(e))
+            return
+        except Exception as e:
+            # the url has to leave requested, or it is never fetched again
+            log.exception('Thumbnail %s failed', url)
+            self.failed.emit(url, str(e))
+            return
+        # decoding is done here as QImage can be used outside the GUI thread, unlike QPixmap
+        image = QImage.fromData(data)
+        logs.timing('thumbnail', time.monotonic() - started, url=url, cached=cached, size=len(data))
+        self.fetched.emit(url, image)
+
+    def download(self, url: str) -> bytes:
+        for attempt in range(FETCH_RETRIES):
+            try:
+                return self.request(url)
+            except (OSError, http.client.HTTPException):
+                if attempt == FETCH_RETRIES - 1:
+                    raise
+                time.sleep(FETCH_BACKOFF * 2 ** attempt)
+
+    def request(self, url: str) -> bytes:
+        for _ in range(MAX_REDIRECTS):
+            parts = urlsplit(url)
+            connection = self.pool.get(parts.scheme, parts.netloc)
+            path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+            try:
+                connection.request('GET', path, headers={'User-Agent': 'Mozilla/5.0', 'Accept': 'image/*'})
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException):
+                # the server may have closed the kept-alive connection, a new one is opened on retry
+                self.pool.drop(parts.scheme, parts.netloc)
+                raise
+            if response.status in (301, 302, 303, 307, 308):
+                url = urljoin(url, response.getheader('Location'))
+                continue
+            if response.status != 200:
+                raise ThumbnailError(f'HTTP {response.status} {response.reason}')
+            return data
+        raise ThumbnailError('Слишком много перенаправлений')
+
+    def fetch_finished(self, url, image):
+        self.requested.discard(url)
+        if image.isNull():
+            self.failed.emit(url, 'Не удалось загрузить изображение')
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.pixmaps[url] = pixmap
+        if len(self.pixmaps) > PIXMAP_CACHE_SIZE:
+            self.pixmaps.popitem(last=False)
+        self.loaded.emit(url, pixmap)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -31,15 +31,188 @@ class Ui_MainWindow(object):
         self.verticalLayout_3 = QtWidgets.QVBoxLayout(self.layoutWidget)
         self.verticalLayout_3.setContentsMargins(0, 0, 0, 0)
         self.verticalLayout_3.setObjectName("verticalLayout_3")
+        self.label_4 = QtWidgets.QLabel(parent=self.layoutWidget)
+        self.label_4.setObjectName("label_4")
+        self.verticalLayout_3.addWidget(self.label_4)
+        self.queueTable = QtWidgets.QTableWidget(parent=self.layoutWidget)
+        self.queueTable.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.queueTable.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self.queueTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.queueTable.setObjectName("queueTable")
+        self.queueTable.setColumnCount(4)
+        self.queueTable.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.queueTable.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.queueTable.setHorizontalHeaderItem(1, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.queueTable.setHorizontalHeaderItem(2, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.queueTable.setHorizontalHeaderItem(3, item)
+        self.queueTable.horizontalHeader().setStretchLastSection(True)
+        self.queueTable.verticalHeader().setVisible(False)
+        self.verticalLayout_3.addWidget(self.queueTable)
+        self.horizontalLayout_7 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_7.setObjectName("horizontalLayout_7")
+        self.pauseBtn = QtWidgets.QPushButton(parent=self.layoutWidget)
+        self.pauseBtn.setObjectName("pauseBtn")
+        self.horizontalLayout_7.addWidget(self.pauseBtn)
+        self.resumeBtn = QtWidgets.QPushButton(parent=self.layoutWidget)
+        self.resumeBtn.setObjectName("resumeBtn")
+        self.horizontalLayout_7.addWidget(self.resumeBtn)
+        self.cancelBtn = QtWidgets.QPushButton(parent=self.layoutWidget)
+        self.cancelBtn.setObjectName("cancelBtn")
+        self.horizontalLayout_7.addWidget(self.cancelBtn)
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_7.addItem(spacerItem)
+        self.label_8 = QtWidgets.QLabel(parent=self.layoutWidget)
+        self.label_8.setObjectName("label_8")
+        self.horizontalLayout_7.addWidget(self.label_8)
+        self.workersBox = QtWidgets.QSpinBox(parent=self.layoutWidget)
+        self.workersBox.setMinimum(1)
+        self.workersBox.setMaximum(16)
+        self.workersBox.setObjectName("workersBox")
+        self.horizontalLayout_7.addWidget(self.workersBox)
+        self.verticalLayout_3.addLayout(self.horizontalLayout_7)
+        self.sideTabs = QtWidgets.QTabWidget(parent=self.layoutWidget)
+        self.sideTabs.setObjectName("sideTabs")
+        self.historyTab = QtWidgets.QWidget()
+        self.historyTab.setObjectName("historyTab")
+        self.verticalLayout_6 = QtWidgets.QVBoxLayout(self.historyTab)
+        self.verticalLayout_6.setObjectName("verticalLayout_6")
         self.horizontalLayout_9 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_9.setObjectName("horizontalLayout_9")
-        self.label = QtWidgets.QLabel(parent=self.layoutWidget)
-        self.label.setObjectName("label")
-        self.horizontalLayout_9.addWidget(self.label)
-        self.verticalLayout_3.addLayout(self.horizontalLayout_9)
-        self.historyList = QtWidgets.QListWidget(parent=self.layoutWidget)
+        self.historySearch = QtWidgets.QLineEdit(parent=self.historyTab)
+        self.historySearch.setClearButtonEnabled(True)
+        self.historySearch.setObjectName("historySearch")
+        self.horizontalLayout_9.addWidget(self.historySearch)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_9)
+        self.horizontalLayout_8 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_8.setObjectName("horizontalLayout_8")
+        self.channelFilter = QtWidgets.QComboBox(parent=self.historyTab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.channelFilter.sizePolicy().hasHeightForWidth())
+        self.channelFilter.setSizePolicy(sizePolicy)
+        self.channelFilter.setEditable(True)
+        self.channelFilter.setInsertPolicy(QtWidgets.QComboBox.InsertPolicy.NoInsert)
+        self.channelFilter.setObjectName("channelFilter")
+        self.horizontalLayout_8.addWidget(self.channelFilter)
+        self.qualityFilter = QtWidgets.QComboBox(parent=self.historyTab)
+        self.qualityFilter.setObjectName("qualityFilter")
+        self.horizontalLayout_8.addWidget(self.qualityFilter)
+        self.dateFilterBox = QtWidgets.QCheckBox(parent=self.historyTab)
+        self.dateFilterBox.setObjectName("dateFilterBox")
+        self.horizontalLayout_8.addWidget(self.dateFilterBox)
+        self.dateFrom = QtWidgets.QDateEdit(parent=self.historyTab)
+        self.dateFrom.setEnabled(False)
+        self.dateFrom.setCalendarPopup(True)
+        self.dateFrom.setObjectName("dateFrom")
+        self.horizontalLayout_8.addWidget(self.dateFrom)
+        self.label_9 = QtWidgets.QLabel(parent=self.historyTab)
+        self.label_9.setObjectName("label_9")
+        self.horizontalLayout_8.addWidget(self.label_9)
+        self.dateTo = QtWidgets.QDateEdit(parent=self.historyTab)
+        self.dateTo.setEnabled(False)
+        self.dateTo.setCalendarPopup(True)
+        self.dateTo.setObjectName("dateTo")
+        self.horizontalLayout_8.addWidget(self.dateTo)
+        self.verticalLayout_6.addLayout(self.horizontalLayout_8)
+        self.historyList = QtWidgets.QListView(parent=self.historyTab)
+        self.historyList.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.historyList.setUniformItemSizes(True)
         self.historyList.setObjectName("historyList")
-        self.verticalLayout_3.addWidget(self.historyList)
+        self.verticalLayout_6.addWidget(self.historyList)
+        self.sideTabs.addTab(self.historyTab, "")
+        self.statsTab = QtWidgets.QWidget()
+        self.statsTab.setObjectName("statsTab")
+        self.verticalLayout_7 = QtWidgets.QVBoxLayout(self.statsTab)
+        self.verticalLayout_7.setObjectName("verticalLayout_7")
+        self.horizontalLayout_19 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_19.setObjectName("horizontalLayout_19")
+        self.statsPeriod = QtWidgets.QComboBox(parent=self.statsTab)
+        self.statsPeriod.setObjectName("statsPeriod")
+        self.statsPeriod.addItem("")
+        self.statsPeriod.addItem("")
+        self.statsPeriod.addItem("")
+        self.statsPeriod.addItem("")
+        self.horizontalLayout_19.addWidget(self.statsPeriod)
+        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_19.addItem(spacerItem1)
+        self.statsRefreshBtn = QtWidgets.QPushButton(parent=self.statsTab)
+        self.statsRefreshBtn.setObjectName("statsRefreshBtn")
+        self.horizontalLayout_19.addWidget(self.statsRefreshBtn)
+        self.verticalLayout_7.addLayout(self.horizontalLayout_19)
+        self.gridLayout = QtWidgets.QGridLayout()
+        self.gridLayout.setObjectName("gridLayout")
+        self.label_16 = QtWidgets.QLabel(parent=self.statsTab)
+        self.label_16.setObjectName("label_16")
+        self.gridLayout.addWidget(self.label_16, 0, 0, 1, 1)
+        self.statsJobsText = QtWidgets.QLabel(parent=self.statsTab)
+        self.statsJobsText.setObjectName("statsJobsText")
+        self.gridLayout.addWidget(self.statsJobsText, 0, 1, 1, 1)
+        self.label_17 = QtWidgets.QLabel(parent=self.statsTab)
+        self.label_17.setObjectName("label_17")
+        self.gridLayout.addWidget(self.label_17, 1, 0, 1, 1)
+        self.statsBytesText = QtWidgets.QLabel(parent=self.statsTab)
+        self.statsBytesText.setObjectName("statsBytesText")
+        self.gridLayout.addWidget(self.statsBytesText, 1, 1, 1, 1)
+        self.label_18 = QtWidgets.QLabel(parent=self.statsTab)
+        self.label_18.setObjectName("label_18")
+        self.gridLayout.addWidget(self.label_18, 2, 0, 1, 1)
+        self.statsThroughputText = QtWidgets.QLabel(parent=self.statsTab)
+        self.statsThroughputText.setObjectName("statsThroughputText")
+        self.gridLayout.addWidget(self.statsThroughputText, 2, 1, 1, 1)
+        self.label_19 = QtWidgets.QLabel(parent=self.statsTab)
+        self.label_19.setObjectName("label_19")
+        self.gridLayout.addWidget(self.label_19, 3, 0, 1, 1)
+        self.statsUtilizationText = QtWidgets.QLabel(parent=self.statsTab)
+        self.statsUtilizationText.setObjectName("statsUtilizationText")
+        self.gridLayout.addWidget(self.statsUtilizationText, 3, 1, 1, 1)
+        self.label_20 = QtWidgets.QLabel(parent=self.statsTab)
+        self.label_20.setObjectName("label_20")
+        self.gridLayout.addWidget(self.label_20, 4, 0, 1, 1)
+        self.statsTtfbText = QtWidgets.QLabel(parent=self.statsTab)
+        self.statsTtfbText.setObjectName("statsTtfbText")
+        self.gridLayout.addWidget(self.statsTtfbText, 4, 1, 1, 1)
+        self.label_21 = QtWidgets.QLabel(parent=self.statsTab)
+        self.label_21.setObjectName("label_21")
+        self.gridLayout.addWidget(self.label_21, 5, 0, 1, 1)
+        self.statsRetriesText = QtWidgets.QLabel(parent=self.statsTab)
+        self.statsRetriesText.setObjectName("statsRetriesText")
+        self.gridLayout.addWidget(self.statsRetriesText, 5, 1, 1, 1)
+        self.label_22 = QtWidgets.QLabel(parent=self.statsTab)
+        self.label_22.setObjectName("label_22")
+        self.gridLayout.addWidget(self.label_22, 6, 0, 1, 1)
+        self.statsPostprocessText = QtWidgets.QLabel(parent=self.statsTab)
+        self.statsPostprocessText.setObjectName("statsPostprocessText")
+        self.gridLayout.addWidget(self.statsPostprocessText, 6, 1, 1, 1)
+        self.verticalLayout_7.addLayout(self.gridLayout)
+        self.label_23 = QtWidgets.QLabel(parent=self.statsTab)
+        self.label_23.setObjectName("label_23")
+        self.verticalLayout_7.addWidget(self.label_23)
+        self.slowExtractorsTable = QtWidgets.QTableWidget(parent=self.statsTab)
+        self.slowExtractorsTable.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.slowExtractorsTable.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.NoSelection)
+        self.slowExtractorsTable.setObjectName("slowExtractorsTable")
+        self.slowExtractorsTable.setColumnCount(5)
+        self.slowExtractorsTable.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.slowExtractorsTable.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.slowExtractorsTable.setHorizontalHeaderItem(1, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.slowExtractorsTable.setHorizontalHeaderItem(2, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.slowExtractorsTable.setHorizontalHeaderItem(3, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.slowExtractorsTable.setHorizontalHeaderItem(4, item)
+        self.slowExtractorsTable.horizontalHeader().setStretchLastSection(True)
+        self.slowExtractorsTable.verticalHeader().setVisible(False)
+        self.verticalLayout_7.addWidget(self.slowExtractorsTable)
+        self.sideTabs.addTab(self.statsTab, "")
+        self.verticalLayout_3.addWidget(self.sideTabs)
         self.layoutWidget1 = QtWidgets.QWidget(parent=self.splitter)
         self.layoutWidget1.setObjectName("layoutWidget1")
         self.verticalLayout = QtWidgets.QVBoxLayout(self.layoutWidget1)
@@ -50,6 +223,12 @@ class Ui_MainWindow(object):
         self.urlInput = QtWidgets.QLineEdit(parent=self.layoutWidget1)
         self.urlInput.setObjectName("urlInput")
         self.horizontalLayout_4.addWidget(self.urlInput)
+        self.prefetchBox = QtWidgets.QCheckBox(parent=self.layoutWidget1)
+        self.prefetchBox.setObjectName("prefetchBox")
+        self.horizontalLayout_4.addWidget(self.prefetchBox)
+        self.refreshBox = QtWidgets.QCheckBox(parent=self.layoutWidget1)
+        self.refreshBox.setObjectName("refreshBox")
+        self.horizontalLayout_4.addWidget(self.refreshBox)
         self.continueBtn = QtWidgets.QPushButton(parent=self.layoutWidget1)
         self.continueBtn.setObjectName("continueBtn")
         self.horizontalLayout_4.addWidget(self.continueBtn)
@@ -80,8 +259,8 @@ class Ui_MainWindow(object):
         self.horizontalLayout = QtWidgets.QHBoxLayout()
         self.horizontalLayout.setSpacing(16)
         self.horizontalLayout.setObjectName("horizontalLayout")
-        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
-        self.horizontalLayout.addItem(spacerItem)
+        spacerItem2 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout.addItem(spacerItem2)
         self.widget_6 = QtWidgets.QWidget(parent=self.autoMode)
         self.widget_6.setObjectName("widget_6")
         self.horizontalLayout_16 = QtWidgets.QHBoxLayout(self.widget_6)
@@ -205,8 +384,8 @@ class Ui_MainWindow(object):
         self.subscribersText.setObjectName("subscribersText")
         self.horizontalLayout_12.addWidget(self.subscribersText)
         self.horizontalLayout.addWidget(self.widget_5)
-        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
-        self.horizontalLayout.addItem(spacerItem1)
+        spacerItem3 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout.addItem(spacerItem3)
         self.verticalLayout_4.addLayout(self.horizontalLayout)
         self.line = QtWidgets.QFrame(parent=self.autoMode)
         self.line.setFrameShape(QtWidgets.QFrame.Shape.HLine)
@@ -215,8 +394,8 @@ class Ui_MainWindow(object):
         self.verticalLayout_4.addWidget(self.line)
         self.horizontalLayout_5 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_5.setObjectName("horizontalLayout_5")
-        spacerItem2 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
-        self.horizontalLayout_5.addItem(spacerItem2)
+        spacerItem4 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_5.addItem(spacerItem4)
         self.label_3 = QtWidgets.QLabel(parent=self.autoMode)
         self.label_3.setObjectName("label_3")
         self.horizontalLayout_5.addWidget(self.label_3)
@@ -228,8 +407,8 @@ class Ui_MainWindow(object):
         self.qualityBox.setSizePolicy(sizePolicy)
         self.qualityBox.setObjectName("qualityBox")
         self.horizontalLayout_5.addWidget(self.qualityBox)
-        spacerItem3 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Minimum)
-        self.horizontalLayout_5.addItem(spacerItem3)
+        spacerItem5 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_5.addItem(spacerItem5)
         self.label_5 = QtWidgets.QLabel(parent=self.autoMode)
         self.label_5.setObjectName("label_5")
         self.horizontalLayout_5.addWidget(self.label_5)
@@ -244,8 +423,8 @@ class Ui_MainWindow(object):
         self.soundBox.addItem("")
         self.soundBox.addItem("")
         self.horizontalLayout_5.addWidget(self.soundBox)
-        spacerItem4 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Minimum)
-        self.horizontalLayout_5.addItem(spacerItem4)
+        spacerItem6 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_5.addItem(spacerItem6)
         self.label_6 = QtWidgets.QLabel(parent=self.autoMode)
         self.label_6.setObjectName("label_6")
         self.horizontalLayout_5.addWidget(self.label_6)
@@ -261,24 +440,41 @@ class Ui_MainWindow(object):
         self.formatBox.addItem("")
         self.formatBox.addItem("")
         self.horizontalLayout_5.addWidget(self.formatBox)
-        spacerItem5 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
-        self.horizontalLayout_5.addItem(spacerItem5)
+        self.planText = QtWidgets.QLabel(parent=self.autoMode)
+        self.planText.setText("")
+        self.planText.setObjectName("planText")
+        self.horizontalLayout_5.addWidget(self.planText)
+        spacerItem7 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_5.addItem(spacerItem7)
         self.verticalLayout_4.addLayout(self.horizontalLayout_5)
         self.tabWidget.addTab(self.autoMode, "")
         self.customMode = QtWidgets.QWidget()
         self.customMode.setObjectName("customMode")
         self.verticalLayout_2 = QtWidgets.QVBoxLayout(self.customMode)
         self.verticalLayout_2.setObjectName("verticalLayout_2")
+        self.horizontalLayout_18 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_18.setObjectName("horizontalLayout_18")
         self.label_7 = QtWidgets.QLabel(parent=self.customMode)
         self.label_7.setObjectName("label_7")
-        self.verticalLayout_2.addWidget(self.label_7)
-        self.qualityTable = QtWidgets.QTableWidget(parent=self.customMode)
+        self.horizontalLayout_18.addWidget(self.label_7)
+        spacerItem8 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_18.addItem(spacerItem8)
+        self.formatKindFilter = QtWidgets.QComboBox(parent=self.customMode)
+        self.formatKindFilter.setObjectName("formatKindFilter")
+        self.formatKindFilter.addItem("")
+        self.formatKindFilter.addItem("")
+        self.formatKindFilter.addItem("")
+        self.formatKindFilter.addItem("")
+        self.horizontalLayout_18.addWidget(self.formatKindFilter)
+        self.codecFilter = QtWidgets.QComboBox(parent=self.customMode)
+        self.codecFilter.setObjectName("codecFilter")
+        self.horizontalLayout_18.addWidget(self.codecFilter)
+        self.verticalLayout_2.addLayout(self.horizontalLayout_18)
+        self.qualityTable = QtWidgets.QTableView(parent=self.customMode)
         self.qualityTable.setAlternatingRowColors(True)
         self.qualityTable.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
         self.qualityTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
         self.qualityTable.setObjectName("qualityTable")
-        self.qualityTable.setColumnCount(0)
-        self.qualityTable.setRowCount(0)
         self.qualityTable.horizontalHeader().setSortIndicatorShown(True)
         self.qualityTable.verticalHeader().setVisible(False)
         self.verticalLayout_2.addWidget(self.qualityTable)
@@ -297,6 +493,16 @@ class Ui_MainWindow(object):
         self.folderSelectBtn.setIcon(icon)
         self.folderSelectBtn.setObjectName("folderSelectBtn")
         self.horizontalLayout_2.addWidget(self.folderSelectBtn)
+        self.turboBox = QtWidgets.QCheckBox(parent=self.layoutWidget1)
+        self.turboBox.setObjectName("turboBox")
+        self.horizontalLayout_2.addWidget(self.turboBox)
+        self.connectionsBox = QtWidgets.QSpinBox(parent=self.layoutWidget1)
+        self.connectionsBox.setEnabled(False)
+        self.connectionsBox.setMinimum(2)
+        self.connectionsBox.setMaximum(32)
+        self.connectionsBox.setProperty("value", 8)
+        self.connectionsBox.setObjectName("connectionsBox")
+        self.horizontalLayout_2.addWidget(self.connectionsBox)
         self.saveBtn = QtWidgets.QPushButton(parent=self.layoutWidget1)
         self.saveBtn.setEnabled(False)
         self.saveBtn.setObjectName("saveBtn")
@@ -319,25 +525,98 @@ class Ui_MainWindow(object):
         MainWindow.setStatusBar(self.statusbar)
 
         self.retranslateUi(MainWindow)
+        self.sideTabs.setCurrentIndex(0)
         self.tabWidget.setCurrentIndex(0)
         self.soundBox.setCurrentIndex(0)
         self.formatBox.setCurrentIndex(1)
         QtCore.QMetaObject.connectSlotsByName(MainWindow)
-        MainWindow.setTabOrder(self.urlInput, self.continueBtn)
+        MainWindow.setTabOrder(self.urlInput, self.prefetchBox)
+        MainWindow.setTabOrder(self.prefetchBox, self.refreshBox)
+        MainWindow.setTabOrder(self.refreshBox, self.continueBtn)
         MainWindow.setTabOrder(self.continueBtn, self.tabWidget)
         MainWindow.setTabOrder(self.tabWidget, self.qualityBox)
         MainWindow.setTabOrder(self.qualityBox, self.soundBox)
         MainWindow.setTabOrder(self.soundBox, self.savePath)
-        MainWindow.setTabOrder(self.savePath, self.saveBtn)
-        MainWindow.setTabOrder(self.saveBtn, self.historyList)
-        MainWindow.setTabOrder(self.historyList, self.qualityTable)
+        MainWindow.setTabOrder(self.savePath, self.turboBox)
+        MainWindow.setTabOrder(self.turboBox, self.connectionsBox)
+        MainWindow.setTabOrder(self.connectionsBox, self.saveBtn)
+        MainWindow.setTabOrder(self.saveBtn, self.sideTabs)
+        MainWindow.setTabOrder(self.sideTabs, self.historySearch)
+        MainWindow.setTabOrder(self.historySearch, self.channelFilter)
+        MainWindow.setTabOrder(self.channelFilter, self.qualityFilter)
+        MainWindow.setTabOrder(self.qualityFilter, self.dateFilterBox)
+        MainWindow.setTabOrder(self.dateFilterBox, self.dateFrom)
+        MainWindow.setTabOrder(self.dateFrom, self.dateTo)
+        MainWindow.setTabOrder(self.dateTo, self.historyList)
+        MainWindow.setTabOrder(self.historyList, self.statsPeriod)
+        MainWindow.setTabOrder(self.statsPeriod, self.statsRefreshBtn)
+        MainWindow.setTabOrder(self.statsRefreshBtn, self.slowExtractorsTable)
+        MainWindow.setTabOrder(self.slowExtractorsTable, self.formatKindFilter)
+        MainWindow.setTabOrder(self.formatKindFilter, self.codecFilter)
+        MainWindow.setTabOrder(self.codecFilter, self.qualityTable)
+        MainWindow.setTabOrder(self.qualityTable, self.queueTable)
+        MainWindow.setTabOrder(self.queueTable, self.pauseBtn)
+        MainWindow.setTabOrder(self.pauseBtn, self.resumeBtn)
+        MainWindow.setTabOrder(self.resumeBtn, self.cancelBtn)
+        MainWindow.setTabOrder(self.cancelBtn, self.workersBox)
 
     def retranslateUi(self, MainWindow):
         _translate = QtCore.QCoreApplication.translate
         MainWindow.setWindowTitle(_translate("MainWindow", "Скачать видео"))
-        self.label.setText(_translate("MainWindow", "История скачиваний"))
+        self.label_4.setText(_translate("MainWindow", "Очередь загрузок"))
+        item = self.queueTable.horizontalHeaderItem(0)
+        item.setText(_translate("MainWindow", "Видео"))
+        item = self.queueTable.horizontalHeaderItem(1)
+        item.setText(_translate("MainWindow", "Статус"))
+        item = self.queueTable.horizontalHeaderItem(2)
+        item.setText(_translate("MainWindow", "Прогресс"))
+        item = self.queueTable.horizontalHeaderItem(3)
+        item.setText(_translate("MainWindow", "Скорость"))
+        self.pauseBtn.setText(_translate("MainWindow", "Пауза"))
+        self.resumeBtn.setText(_translate("MainWindow", "Возобновить"))
+        self.cancelBtn.setText(_translate("MainWindow", "Отменить"))
+        self.label_8.setText(_translate("MainWindow", "Потоков:"))
+        self.historySearch.setPlaceholderText(_translate("MainWindow", "Поиск по названию, каналу или URL"))
+        self.dateFilterBox.setText(_translate("MainWindow", "Дата:"))
+        self.label_9.setText(_translate("MainWindow", "—"))
+        self.sideTabs.setTabText(self.sideTabs.indexOf(self.historyTab), _translate("MainWindow", "История скачиваний"))
+        self.statsPeriod.setItemText(0, _translate("MainWindow", "За сутки"))
+        self.statsPeriod.setItemText(1, _translate("MainWindow", "За неделю"))
+        self.statsPeriod.setItemText(2, _translate("MainWindow", "За месяц"))
+        self.statsPeriod.setItemText(3, _translate("MainWindow", "За всё время"))
+        self.statsRefreshBtn.setText(_translate("MainWindow", "Обновить"))
+        self.label_16.setText(_translate("MainWindow", "Загрузок:"))
+        self.statsJobsText.setText(_translate("MainWindow", "—"))
+        self.label_17.setText(_translate("MainWindow", "Скачано:"))
+        self.statsBytesText.setText(_translate("MainWindow", "—"))
+        self.label_18.setText(_translate("MainWindow", "Общая скорость:"))
+        self.statsThroughputText.setText(_translate("MainWindow", "—"))
+        self.label_19.setText(_translate("MainWindow", "Загруженность потоков:"))
+        self.statsUtilizationText.setText(_translate("MainWindow", "—"))
+        self.label_20.setText(_translate("MainWindow", "Время до первого байта:"))
+        self.statsTtfbText.setText(_translate("MainWindow", "—"))
+        self.label_21.setText(_translate("MainWindow", "Повторных попыток:"))
+        self.statsRetriesText.setText(_translate("MainWindow", "—"))
+        self.label_22.setText(_translate("MainWindow", "Время обработки:"))
+        self.statsPostprocessText.setText(_translate("MainWindow", "—"))
+        self.label_23.setText(_translate("MainWindow", "Самые медленные источники"))
+        item = self.slowExtractorsTable.horizontalHeaderItem(0)
+        item.setText(_translate("MainWindow", "Источник"))
+        item = self.slowExtractorsTable.horizontalHeaderItem(1)
+        item.setText(_translate("MainWindow", "Загрузок"))
+        item = self.slowExtractorsTable.horizontalHeaderItem(2)
+        item.setText(_translate("MainWindow", "Скорость"))
+        item = self.slowExtractorsTable.horizontalHeaderItem(3)
+        item.setText(_translate("MainWindow", "До первого байта"))
+        item = self.slowExtractorsTable.horizontalHeaderItem(4)
+        item.setText(_translate("MainWindow", "Повторы"))
+        self.sideTabs.setTabText(self.sideTabs.indexOf(self.statsTab), _translate("MainWindow", "Статистика"))
         self.urlInput.setToolTip(_translate("MainWindow", "Введите URL или название видео"))
         self.urlInput.setPlaceholderText(_translate("MainWindow", "Введите URL видео"))
+        self.prefetchBox.setToolTip(_translate("MainWindow", "Загружать сведения о видео, как только ссылка вставлена в поле или скопирована в буфер обмена"))
+        self.prefetchBox.setText(_translate("MainWindow", "Заранее"))
+        self.refreshBox.setToolTip(_translate("MainWindow", "Не использовать сохранённую информацию о видео"))
+        self.refreshBox.setText(_translate("MainWindow", "Обновить"))
         self.continueBtn.setText(_translate("MainWindow", "Продолжить"))
         self.videoName.setText(_translate("MainWindow", "Название видео"))
         self.durationText.setText(_translate("MainWindow", "длительность"))
@@ -361,8 +640,15 @@ class Ui_MainWindow(object):
         self.formatBox.setItemText(2, _translate("MainWindow", "webm"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.autoMode), _translate("MainWindow", "Автоматический режим"))
         self.label_7.setText(_translate("MainWindow", "Выберите нужное качество видео вручную:"))
+        self.formatKindFilter.setItemText(0, _translate("MainWindow", "Все форматы"))
+        self.formatKindFilter.setItemText(1, _translate("MainWindow", "Видео со звуком"))
+        self.formatKindFilter.setItemText(2, _translate("MainWindow", "Только видео"))
+        self.formatKindFilter.setItemText(3, _translate("MainWindow", "Только аудио"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.customMode), _translate("MainWindow", "Ручной режим"))
         self.savePath.setPlaceholderText(_translate("MainWindow", "Куда сохранить файл?"))
+        self.turboBox.setToolTip(_translate("MainWindow", "Скачивать файл или фрагменты видео в несколько соединений"))
+        self.turboBox.setText(_translate("MainWindow", "Турбо"))
+        self.connectionsBox.setToolTip(_translate("MainWindow", "Количество соединений"))
         self.saveBtn.setText(_translate("MainWindow", "Скачать"))
         self.downloadProgress.setFormat(_translate("MainWindow", "Загрузка видео %p%"))
         self.downloadSpeed.setText(_translate("MainWindow", "0 МБ/с"))
@@ -0,0 +1,113 @@
+from typing import Optional
+
+from PyQt6 import QtCore, QtWidgets
+
+from formats import codec_name
+
+COLUMNS = [
+    'format_id', 'ext', 'resolution', 'fps', 'filesize', 'filesize_approx', 'tbr',
+    'vcodec', 'vbr', 'audio_channels', 'acodec', 'abr', 'asr',
+    'format', 'format_note', 'dynamic_range', 'url'
+]
+ALL_FORMATS, VIDEO_WITH_AUDIO, VIDEO_ONLY, AUDIO_ONLY = range(4)
+# raw values, so numbers are sorted as numbers and not as text
+SORT_ROLE = QtCore.Qt.ItemDataRole.UserRole
+FORMAT_ROLE = QtCore.Qt.ItemDataRole.UserRole + 1
+SAMPLE_ROWS = 20
+COLUMN_PADDING = 16
+MAX_COLUMN_WIDTH = 300
+
+
+class FormatModel(QtCore.QAbstractTableModel):
+    def __init__(self):
+        super().__init__()
+        self.formats: list[dict] = []
+        # (video, audio) codec names of every format, the filter checks them for each row
+        self.codecs: list[tuple[Optional[str], Optional[str]]] = []
+
+    def set_formats(self, formats: list[dict]):
+        self.beginResetModel()
+        self.formats = formats
+        self.codecs = [(codec_name(fmt.get('vcodec')), codec_name(fmt.get('acodec'))) for fmt in formats]
+        self.endResetModel()
+
+    def codec_names(self) -> list[str]:
+        names = {name for codecs in self.codecs for name in codecs}
+        names.discard(None)
+        return sorted(names)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.formats)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        # cells are only made for the painted rows, nothing is built for the rest of the list
+        fmt = self.formats[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return str(fmt.get(COLUMNS[index.column()], '') or '')
+        if role == SORT_ROLE:
+            return fmt.get(COLUMNS[index.column()])
+        if role == FORMAT_ROLE:
+            return fmt
+        return None
+
+
+class FormatFilterModel(QtCore.QSortFilterProxyModel):
+    def __init__(self):
+        super().__init__()
+        self.kind = ALL_FORMATS
+        self.codec = ''
+        self.setSortRole(SORT_ROLE)
+
+    def set_kind(self, kind: int):
+        if kind != self.kind:
+            self.kind = kind
+            self.invalidateFilter()
+
+    def set_codec(self, codec: str):
+        if codec != self.codec:
+            self.codec = codec
+            self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.kind == ALL_FORMATS and not self.codec:
+            return True
+        video, audio = self.sourceModel().codecs[source_row]
+        if self.kind == VIDEO_WITH_AUDIO and not (video and audio) or \
+                self.kind == VIDEO_ONLY and not (video and not audio) or \
+                self.kind == AUDIO_ONLY and not (audio and not video):
+            return False
+        return not self.codec or self.codec in (video, audio)
+
+    def lessThan(self, left, right):
+        # unknown values go to the end whichever way the column is sorted
+        a, b = left.data(SORT_ROLE), right.data(SORT_ROLE)
+        if a is None or b is None:
+            return a is not b and (b is None) == (self.sortOrder() == QtCore.Qt.SortOrder.AscendingOrder)
+        if isinstance(a, str) or isinstance(b, str):
+            return str(a) < str(b)
+        return a < b
+
+
+def fit_columns(view: QtWidgets.QTableView):
+    # measuring every cell as resizeColumnsToContents does is slow for long format lists,
+    # so the widths come from the header and a few rows spread over the table
+    model = view.model()
+    rows = model.rowCount()
+    sample = range(0, rows, max(1, rows // SAMPLE_ROWS))
+    metrics = view.fontMetrics()
+    header_metrics = view.horizontalHeader().fontMetrics()
+    for column in range(model.columnCount()):
+        width = header_metrics.horizontalAdvance(model.headerData(column, QtCore.Qt.Orientation.Horizontal))
+        for row in sample:
+            width = max(width, metrics.horizontalAdvance(model.index(row, column).data()))
+        view.setColumnWidth(column, min(width + COLUMN_PADDING, MAX_COLUMN_WIDTH))
@@ -0,0 +1,351 @@
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Callable
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+from database import Database, history_query, previews_query, preview_insert
+from models import HistoryEntry, HistoryFilter
+
+log = logging.getLogger(__name__)
+
+PAGE_SIZE = 100
+PREVIEW_SIZE = 80
+# stored for screens with a device pixel ratio above 1
+LARGE_PREVIEW_SIZE = 160
+PREVIEW_FORMAT = 'JPG'
+PREVIEW_QUALITY = 85
+PREVIEW_CACHE_SIZE = 256
+ROW_MARGIN = 4
+ROW_SPACING = 16
+
+
+def encode_preview(image: QtGui.QImage, size: int) -> bytes:
+    scaled = image.scaled(size, size, QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                          QtCore.Qt.TransformationMode.SmoothTransformation)
+    data = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(data)
+    buffer.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+    scaled.save(buffer, PREVIEW_FORMAT, PREVIEW_QUALITY)
+    return data.data()
+
+
+def scaled_previews(data: bytes) -> Optional[tuple[bytes, bytes]]:
+    image = QtGui.QImage.fromData(data)
+    if image.isNull():
+        return None
+    return encode_preview(image, PREVIEW_SIZE), encode_preview(image, LARGE_PREVIEW_SIZE)
+
+
+class HistoryModel(QtCore.QAbstractListModel):
+    preview_loaded = QtCore.pyqtSignal(int, QtGui.QImage)
+    # entry id, the file it was made from (empty for a new download), small and large preview
+    preview_generated = QtCore.pyqtSignal(int, str, bytes, bytes)
+    page_fetched = QtCore.pyqtSignal()
+
+    def __init__(self, db: Database, large_previews: bool = False):
+        super().__init__()
+        self.db = db
+        self.large_previews = large_previews
+        self.entries: list[HistoryEntry] = []
+        self.exhausted = False
+        self.fetching = False
+        # pages requested before a reset are dropped when they arrive
+        self.generation = 0
+        self.filter = HistoryFilter()
+        self.previews: OrderedDict[int, QtGui.QPixmap] = OrderedDict()
+        self.requested_previews: set[int] = set()
+        # previews asked for while painting, read from the database in one query
+        self.wanted_previews: list[int] = []
+        self.preview_timer = QtCore.QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(0)
+        self.preview_timer.timeout.connect(self.fetch_previews)
+        self.executor = ThreadPoolExecutor(2, thread_name_prefix='preview')
+        self.preview_loaded.connect(self.preview_finished)
+        self.preview_generated.connect(self.save_preview)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.exhausted and not self.fetching
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self.fetching:
+            return
+        self.fetching = True
+        generation = self.generation
+        # keyset pagination, so every page costs the same however deep the list is scrolled
+        query, params = history_query(self.filter, self.entries[-1].id if self.entries else None, limit=PAGE_SIZE)
+        self.db.query(query, params, lambda rows: self.page_loaded(generation, rows),
+                      lambda message: self.page_failed(generation))
+
+    def page_loaded(self, generation, rows):
+        if generation != self.generation:
+            return
+        self.fetching = False
+        self.exhausted = len(rows) < PAGE_SIZE
+        self.page_fetched.emit()
+        if not rows:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), len(self.entries), len(self.entries) + len(rows) - 1)
+        self.entries.extend(HistoryEntry(*row) for row in rows)
+        self.endInsertRows()
+
+    def page_failed(self, generation):
+        # asked again the next time the view wants more rows
+        if generation == self.generation:
+            self.fetching = False
+
+    def set_filter(self, history_filter: HistoryFilter):
+        if history_filter != self.filter:
+            self.filter = history_filter
+            self.reload()
+
+    def reload(self):
+        self.beginResetModel()
+        self.generation += 1
+        self.entries.clear()
+        self.exhausted = False
+        self.fetching = False
+        self.endResetModel()
+
+    def prepend(self, entry: HistoryEntry):
+        if self.filter.is_empty():
+            self.insert(entry)
+            return
+        generation = self.generation
+        query, params = history_query(self.filter, entry_id=entry.id)
+        self.db.query(query, params, lambda rows: rows and generation == self.generation and self.insert(entry))
+
+    def insert(self, entry: HistoryEntry):
+        # new entries have the greatest ids, so they go on top without touching the rest
+        row = self.insert_position(entry.id)
+        if row == len(self.entries) and not self.exhausted:
+            # will come with one of the next pages
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.entries.insert(row, entry)
+        self.endInsertRows()
+
+    def update(self, entry: HistoryEntry):
+        row = self.row_of(entry.id)
+        if row is None:
+            return
+        self.entries[row] = entry
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove(self, entry_id):
+        self.previews.pop(entry_id, None)
+        row = self.row_of(entry_id)
+        if row is None:
+            return
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self.entries[row]
+        self.endRemoveRows()
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return entry.name
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole:
+            return entry.path
+        if role == QtCore.Qt.ItemDataRole.DecorationRole:
+            return self.preview(entry.id)
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return entry
+        return None
+
+    def preview(self, entry_id):
+        # only called for the painted rows, so previews are read just for the visible part of the list
+        pixmap = self.previews.get(entry_id)
+        if pixmap is not None:
+            self.previews.move_to_end(entry_id)
+        elif entry_id not in self.requested_previews:
+            self.requested_previews.add(entry_id)
+            self.wanted_previews.append(entry_id)
+            self.preview_timer.start()
+        return pixmap
+
+    def fetch_previews(self):
+        entry_ids, self.wanted_previews = self.wanted_previews, []
+        query, params = previews_query(entry_ids, self.large_previews)
+        self.db.query(query, params, lambda rows: self.previews_fetched(entry_ids, rows),
+                      lambda message: self.requested_previews.difference_update(entry_ids))
+
+    def previews_fetched(self, entry_ids, rows):
+        found = set()
+        for entry_id, data in rows:
+            found.add(entry_id)
+            self.executor.submit(self.decode_preview, entry_id, data)
+        for entry_id in entry_ids:
+            if entry_id not in found:
+                # no thumbnail, or it is still being made; an empty pixmap keeps the row from asking again
+                self.preview_loaded.emit(entry_id, QtGui.QImage())
+
+    def decode_preview(self, entry_id, data):
+        image = QtGui.QImage.fromData(data)
+        if self.large_previews:
+            # drawn in the same 80x80 logical pixels
+            image.setDevicePixelRatio(LARGE_PREVIEW_SIZE / PREVIEW_SIZE)
+        self.preview_loaded.emit(entry_id, image)
+
+    def add_preview(self, entry_id: int, read_thumbnail: Callable[[], Optional[bytes]]):
+        # scaled once when the entry is added, the list only decodes the small image afterwards;
+        # the thumbnail is read in the executor too, the store may be busy with fetches
+        self.requested_previews.add(entry_id)
+        self.executor.submit(self.generate_new_preview, entry_id, read_thumbnail)
+
+    def generate_new_preview(self, entry_id, read_thumbnail):
+        thumbnail = read_thumbnail()
+        if thumbnail:
+            self.generate_preview(entry_id, thumbnail, '')
+        else:
+            self.preview_loaded.emit(entry_id, QtGui.QImage())
+
+    def import_previews(self, directory: Path):
+        # previews of older versions were full size thumbnails in files named by the entry id
+        if directory.is_dir():
+            self.executor.submit(self.import_preview_files, directory)
+
+    def import_preview_files(self, directory: Path):
+        if not any(directory.iterdir()):
+            directory.rmdir()
+            return
+        for path in directory.glob('*.webp'):
+            if path.stem.isdigit():
+                self.generate_preview(int(path.stem), path.read_bytes(), str(path))
+            else:
+                path.unlink(missing_ok=True)
+
+    def generate_preview(self, entry_id, thumbnail, path):
+        previews = scaled_previews(thumbnail)
+        if previews is None:
+            log.warning('Preview of history entry %d is not an image', entry_id)
+            if path:
+                Path(path).unlink(missing_ok=True)
+            return
+        self.preview_generated.emit(entry_id, path, *previews)
+
+    def save_preview(self, entry_id, path, small, large):
+        query, params = preview_insert(entry_id, small, large)
+        self.db.execute(query, params, lambda _: self.preview_saved(entry_id, path))
+
+    def preview_saved(self, entry_id, path):
+        if path:
+            Path(path).unlink(missing_ok=True)
+        # a row painted before has an empty preview, it is read again once the row is repainted
+        if self.previews.pop(entry_id, None) is not None or entry_id in self.requested_previews:
+            self.requested_previews.discard(entry_id)
+            row = self.row_of(entry_id)
+            if row is not None:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [QtCore.Qt.ItemDataRole.DecorationRole])
+
+    def preview_finished(self, entry_id, image):
+        self.requested_previews.discard(entry_id)
+        self.previews[entry_id] = QtGui.QPixmap.fromImage(image)
+        if len(self.previews) > PREVIEW_CACHE_SIZE:
+            self.previews.popitem(last=False)
+        row = self.row_of(entry_id)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [QtCore.Qt.ItemDataRole.DecorationRole])
+
+    def insert_position(self, entry_id):
+        # entries are sorted by id descending
+        low, high = 0, len(self.entries)
+        while low < high:
+            middle = (low + high) // 2
+            if self.entries[middle].id > entry_id:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def row_of(self, entry_id):
+        row = self.insert_position(entry_id)
+        if row < len(self.entries) and self.entries[row].id == entry_id:
+            return row
+        return None
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class HistoryDelegate(QtWidgets.QStyledItemDelegate):
+    link_clicked = QtCore.pyqtSignal(str)
+    entry_clicked = QtCore.pyqtSignal(object)
+
+    def fonts(self, option):
+        name_font = QtGui.QFont(option.font.family(), 11, QtGui.QFont.Weight.Bold)
+        return name_font, option.font
+
+    def name_rect(self, option):
+        name_font, font = self.fonts(option)
+        name_height = QtGui.QFontMetrics(name_font).height()
+        height = name_height + QtGui.QFontMetrics(font).height() * 2
+        rect = option.rect.adjusted(ROW_MARGIN + PREVIEW_SIZE + ROW_SPACING, ROW_MARGIN, -ROW_MARGIN, 0)
+        rect.setTop(rect.top() + max(0, (PREVIEW_SIZE - height) // 2))
+        rect.setHeight(name_height)
+        return rect
+
+    def paint(self, painter, option, index):
+        entry = index.data(QtCore.Qt.ItemDataRole.UserRole)
+        opt = QtWidgets.QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ''
+        opt.icon = QtGui.QIcon()
+        style = opt.widget.style() if opt.widget else QtWidgets.QApplication.style()
+        style.drawControl(QtWidgets.QStyle.ControlElement.CE_ItemViewItem, opt, painter, opt.widget)
+
+        painter.save()
+        preview = index.data(QtCore.Qt.ItemDataRole.DecorationRole)
+        if preview is not None and not preview.isNull():
+            image_rect = QtCore.QRect(QtCore.QPoint(0, 0), preview.deviceIndependentSize().toSize())
+            image_rect.moveCenter(QtCore.QRect(option.rect.left() + ROW_MARGIN, option.rect.top() + ROW_MARGIN,
+                                               PREVIEW_SIZE, PREVIEW_SIZE).center())
+            painter.drawPixmap(image_rect, preview)
+
+        name_font, font = self.fonts(option)
+        name_rect = self.name_rect(option)
+        painter.setFont(name_font)
+        painter.setPen(option.palette.color(QtGui.QPalette.ColorRole.Link))
+        painter.drawText(name_rect, QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter,
+                         QtGui.QFontMetrics(name_font).elidedText(entry.name, QtCore.Qt.TextElideMode.ElideRight,
+                                                                  name_rect.width()))
+
+        painter.setFont(font)
+        painter.setPen(option.palette.color(QtGui.QPalette.ColorRole.Text))
+        line_height = QtGui.QFontMetrics(font).height()
+        line_rect = QtCore.QRect(name_rect.left(), name_rect.bottom() + 1, name_rect.width(), line_height)
+        painter.drawText(line_rect, QtCore.Qt.AlignmentFlag.AlignLeft, entry.channel)
+        line_rect.translate(0, line_height)
+        duration_width = QtGui.QFontMetrics(font).horizontalAdvance(entry.duration)
+        painter.drawText(line_rect, QtCore.Qt.AlignmentFlag.AlignLeft, entry.duration)
+        line_rect.setLeft(line_rect.left() + duration_width + (ROW_SPACING if entry.duration else 0))
+        painter.drawText(line_rect, QtCore.Qt.AlignmentFlag.AlignLeft, entry.quality)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QtCore.QSize(option.rect.width(), PREVIEW_SIZE + ROW_MARGIN * 2)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QtCore.QEvent.Type.MouseButtonRelease and \
+                event.button() == QtCore.Qt.MouseButton.LeftButton:
+            entry = index.data(QtCore.Qt.ItemDataRole.UserRole)
+            name_rect = self.name_rect(option)
+            name_rect.setWidth(min(name_rect.width(),
+                                   QtGui.QFontMetrics(self.fonts(option)[0]).horizontalAdvance(entry.name)))
+            if name_rect.contains(event.position().toPoint()):
+                self.link_clicked.emit(entry.url)
+            else:
+                self.entry_clicked.emit(entry)
+            return True
+        return False
@@ -0,0 +1,45 @@
+from PyQt6 import QtCore, QtWidgets
+
+
+class Ui_PlaylistDialog(QtWidgets.QDialog):
+    def __init__(self, parent, title, entries):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(640, 720)
+        self.verticalLayout = QtWidgets.QVBoxLayout()
+
+        self.entriesList = QtWidgets.QListWidget()
+        self.entriesList.setUniformItemSizes(True)
+        for i, entry in enumerate(entries):
+            item = QtWidgets.QListWidgetItem(f"{i + 1}. {entry.get('title') or entry.get('url')}")
+            if entry.get('duration_string') or entry.get('duration'):
+                item.setText(f"{item.text()} ({entry.get('duration_string') or entry.get('duration')})")
+            item.setFlags(item.flags() | QtCore.Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.CheckState.Checked)
+            self.entriesList.addItem(item)
+        self.verticalLayout.addWidget(self.entriesList)
+
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.selectAllBtn = QtWidgets.QPushButton('Выбрать все')
+        self.selectAllBtn.clicked.connect(lambda: self.set_all_checked(QtCore.Qt.CheckState.Checked))
+        self.selectNoneBtn = QtWidgets.QPushButton('Снять выбор')
+        self.selectNoneBtn.clicked.connect(lambda: self.set_all_checked(QtCore.Qt.CheckState.Unchecked))
+        self.buttonBox = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Ok | QtWidgets.QDialogButtonBox.StandardButton.Cancel)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+        self.horizontalLayout.addWidget(self.selectAllBtn)
+        self.horizontalLayout.addWidget(self.selectNoneBtn)
+        self.horizontalLayout.addStretch(1)
+        self.horizontalLayout.addWidget(self.buttonBox)
+        self.verticalLayout.addLayout(self.horizontalLayout)
+
+        self.setLayout(self.verticalLayout)
+
+    def set_all_checked(self, state):
+        for i in range(self.entriesList.count()):
+            self.entriesList.item(i).setCheckState(state)
+
+    def selected_indexes(self):
+        return [i for i in range(self.entriesList.count())
+                if self.entriesList.item(i).checkState() == QtCore.Qt.CheckState.Checked]